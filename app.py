@@ -1,13 +1,22 @@
-from database_sqlite import get_db
+import time
+_boot_started = time.perf_counter()
+
+from database_sqlite import get_db, get_pool_stats, decode_cursor
 from bson import ObjectId
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
-from ml.router import predict_department, predict_worker
+from ml.router import predict_worker, warm_up_async, ml_status
 from flask_babel import Babel
-from translations import translations
+import i18n
+from config import Config
+from stats_cache import stats_cache
+from classification_queue import classification_queue
+from uploads import ALLOWED_EXTENSIONS, save_upload
+from thumbnails import thumbnailer, thumb_url
+import static_assets
+import fragment_cache
 
 # ML router already imported above with fallback
 
@@ -16,25 +25,44 @@ app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'super_secret_key_change_in_production')
 app.config['BABEL_DEFAULT_LOCALE'] = 'en'
 app.config['LANGUAGES'] = ['en', 'kn', 'hi', 'te', 'ta']
+static_assets.init_app(app)
+fragment_cache.init_app(app)
 
 def get_locale():
     return session.get("lang", "en")
 
 babel = Babel(app, locale_selector=get_locale)
+
+@app.before_request
+def bind_translator():
+    # Resolve the language once per request instead of on every _() call
+    g.translate = i18n.translator(session.get('lang', 'en'))
+
 def _(key):
-    lang = session.get('lang', 'en')
-    return translations.get(lang, translations['en']).get(key, key)
+    translate = g.get('translate') or i18n.translator(session.get('lang', 'en'))
+    return translate(key)
 @app.context_processor
 def inject_translator():
-    return dict(_=_)
+    return dict(_=g.get('translate') or _)
+
+@app.context_processor
+def inject_image_helpers():
+    return dict(thumb_url=thumb_url)
 
 # ---- IMAGE UPLOAD CONFIG ----
 UPLOAD_FOLDER = "static/uploads"
-ALLOWED_EXTENSIONS = None
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+# Requests above this size are rejected before the body is parsed
+app.config["MAX_CONTENT_LENGTH"] = Config.MAX_CONTENT_LENGTH
 
-def allowed_file(filename):
-    return True
+@app.errorhandler(413)
+def upload_too_large(e):
+    flash(f"❌ File too large! Images must be under {Config.MAX_IMAGE_SIZE / (1024 * 1024):.3g} MB.", "danger")
+    return redirect(request.referrer or url_for("home"))
+
+
+def flash_not_an_image():
+    flash(f"Only image files ({', '.join(sorted(ALLOWED_EXTENSIONS))}) can be uploaded!", "danger")
 
 # ---- DATABASE CONNECTION ----
 # Database connection handled by database.py
@@ -46,6 +74,34 @@ def get_workers():
     return workers
 
 
+# ---- PAGINATION ----
+def page_filters(*fields):
+    """Read page size, cursor and equality filters from the query string
+
+    Returns (query, page_size, cursor, page_args); page_args holds the values
+    the next/first page links must carry over.
+    """
+    page_size = request.args.get("per_page", Config.PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, Config.MAX_PAGE_SIZE))
+    page_args = dict(request.view_args or {}, per_page=page_size)
+
+    query = {}
+    for field in fields:
+        value = request.args.get(field, "").strip()
+        if value:
+            query[field] = value
+            page_args[field] = value
+
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            cursor = None
+
+    return query, page_size, cursor, page_args
+
+
 # ---- DEPARTMENT WORKERS ----
 
 
@@ -55,7 +111,7 @@ def get_workers():
 def debug_admins():
     """Debug endpoint to check department admins"""
     db = get_db()
-    admins = db.dept_admins.find()
+    admins = list(db.dept_admins.find())
     
     result = {
         "total_admins": len(admins),
@@ -73,6 +129,21 @@ def debug_admins():
     
     return result
 
+@app.route("/debug/pool")
+def debug_pool():
+    """Debug endpoint to inspect SQLite connection pool metrics"""
+    return get_pool_stats()
+
+@app.route("/debug/ml")
+def debug_ml():
+    """Debug endpoint for model readiness and worker startup time"""
+    return dict(
+        ml_status(),
+        classification=classification_queue.stats(),
+        thumbnails=thumbnailer.stats(),
+        app_boot_seconds=APP_BOOT_SECONDS
+    )
+
 @app.route("/setup/create-admins")
 def setup_create_admins():
     """Manually create department admins"""
@@ -155,15 +226,11 @@ def landing():
     if 'lang' not in session:
         session['lang'] = 'en'
     
-    db = get_db()
-
-    total_complaints = db.complaints.count_documents({})
-
-    solved_complaints = db.complaints.count_documents({"status": {"$regex": "resolved", "$options": "i"}})
-
-    pending_complaints = db.complaints.count_documents({"status": {"$regex": "pending", "$options": "i"}})
-
-    in_progress_complaints = db.complaints.count_documents({"status": {"$regex": "in progress", "$options": "i"}})
+    counts = stats_cache.get()
+    total_complaints = counts["total"]
+    solved_complaints = counts["resolved"]
+    pending_complaints = counts["pending"]
+    in_progress_complaints = counts["in_progress"]
 
     current_lang = session.get('lang', 'en')
     print(f"Current language in home route: {current_lang}")  # Debug print
@@ -241,7 +308,7 @@ def register():
         try:
             db = get_db()
             # Check if email already exists
-            if db.users.find_one({"email": email}):
+            if db.users.find_one({"email": email}, {"id": 1}):
                 flash("Email already exists! Please use a different email.", "error")
                 return render_template("register.html")
             
@@ -305,11 +372,12 @@ def user_dashboard():
             except:
                 pass
 
-    # Count totals
-    total = db.complaints.count_documents({"user_id": user_id})
-    resolved = db.complaints.count_documents({"user_id": user_id, "status": "Resolved"})
-    pending = db.complaints.count_documents({"user_id": user_id, "status": "Pending"})
-    in_progress = db.complaints.count_documents({"user_id": user_id, "status": {"$regex": "in progress", "$options": "i"}})
+    # Count totals (one GROUP BY status pass)
+    counts = db.complaints.status_counts({"user_id": user_id})
+    total = counts["total"]
+    resolved = counts["resolved"]
+    pending = counts["pending"]
+    in_progress = counts["in_progress"]
 
     return render_template(
         "user_dashboard.html",
@@ -348,55 +416,19 @@ def admin_dashboard():
 
     db = get_db()
 
-    # Fetch all complaints (simplified for SQLite)
-    complaints = list(db.complaints.find())
-    
-    # Manually join with users and workers
-    for complaint in complaints:
-        # Get user info
-        if complaint.get("user_id"):
-            try:
-                user_id = int(complaint["user_id"]) if str(complaint["user_id"]).isdigit() else None
-                if user_id:
-                    user = db.users.find_one({"id": user_id})
-                    if user:
-                        complaint["user_name"] = user.get("name")
-            except (ValueError, TypeError, AttributeError):
-                pass
-        
-        # Get worker info
-        if complaint.get("assigned_worker_id"):
-            try:
-                worker_id = int(complaint["assigned_worker_id"])
-                worker = db.workers.find_one({"id": worker_id})
-                if worker:
-                    complaint["assigned_worker_name"] = worker.get("name")
-                    complaint["assigned_worker_phone"] = worker.get("phone")
-                    complaint["worker_department"] = worker.get("department")
-            except (ValueError, TypeError):
-                pass
-    
-    # Sort by created_at (newest first)
-    complaints.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-
-    # Fetch all workers
-    all_workers = list(db.workers.find())
-
-    # Complaint statistics
-    total = db.complaints.count_documents({})
-    pending = db.complaints.count_documents({"status": "Pending"})
-    in_progress = db.complaints.count_documents({"status": "In Progress"})
-    resolved = db.complaints.count_documents({"status": "Resolved"})
-
-    # Department-wise complaint counts (manual grouping for SQLite)
-    all_complaints_for_dept = list(db.complaints.find())
-    dept_counts_dict = {}
-    for c in all_complaints_for_dept:
-        dept = c.get("department", "Unknown")
-        dept_counts_dict[dept] = dept_counts_dict.get(dept, 0) + 1
-    
-    # Sort by count
-    dept_items = sorted(dept_counts_dict.items(), key=lambda x: x[1], reverse=True)
+    # One page of complaints with user and worker info (single JOIN, newest first)
+    query, page_size, cursor, page_args = page_filters("status", "department")
+    complaints, next_cursor = db.complaints.find_page_with_details(query, page_size, cursor)
+
+    # Complaint statistics (one GROUP BY status pass)
+    counts = db.complaints.status_counts()
+    total = counts["total"]
+    pending = counts["pending"]
+    in_progress = counts["in_progress"]
+    resolved = counts["resolved"]
+
+    # Department-wise complaint counts (GROUP BY, sorted by count)
+    dept_items = db.complaints.count_by("department")
     dept_labels = [item[0] for item in dept_items]
     dept_counts = [item[1] for item in dept_items]
 
@@ -415,13 +447,15 @@ def admin_dashboard():
         "admin_dashboard.html",
         name=session["name"],
         complaints=complaints,
-        all_workers=all_workers,     # ✅ Pass worker list to template
+        load_workers=get_workers,    # ✅ Worker list, loaded only when its fragment is not cached
         total_all=total,
         pending_all=pending,
         in_progress_all=in_progress,
         resolved_all=resolved,
         dept_labels=dept_labels,     # ✅ Department names for chart
-        dept_counts=dept_counts      # ✅ Complaint counts per department
+        dept_counts=dept_counts,     # ✅ Complaint counts per department
+        next_cursor=next_cursor,
+        page_args=page_args
     )
 # ---- DEPARTMENT DASHBOARD ----
 from datetime import datetime
@@ -451,30 +485,16 @@ def department_dashboard(dept_name):
 
     db = get_db()
 
-    # Fetch complaints for this department with user info
-    complaints = list(db.complaints.aggregate([
-        {"$match": {"department": dept_name}},
-        {"$lookup": {
-            "from": "users",
-            "let": {"user_id_str": "$user_id"},
-            "pipeline": [
-                {"$addFields": {"id_str": {"$toString": "$_id"}}},
-                {"$match": {"$expr": {"$eq": ["$id_str", "$$user_id_str"]}}}
-            ],
-            "as": "user_info"
-        }},
-        {"$unwind": {"path": "$user_info", "preserveNullAndEmptyArrays": True}},
-        {"$addFields": {
-            "id": {"$toString": "$_id"},
-            "user_name": "$user_info.name"
-        }},
-        {"$sort": {"created_at": -1}}
-    ]))
+    # One page of this department's complaints with user info (newest first)
+    query, page_size, cursor, page_args = page_filters("status")
+    query["department"] = dept_name
+    complaints, next_cursor = db.complaints.find_page_with_details(query, page_size, cursor)
 
-    total = db.complaints.count_documents({"department": dept_name})
-    pending = db.complaints.count_documents({"department": dept_name, "status": "Pending"})
-    in_progress = db.complaints.count_documents({"department": dept_name, "status": "In Progress"})
-    resolved = db.complaints.count_documents({"department": dept_name, "status": "Resolved"})
+    counts = db.complaints.status_counts({"department": dept_name})
+    total = counts["total"]
+    pending = counts["pending"]
+    in_progress = counts["in_progress"]
+    resolved = counts["resolved"]
 
     for c in complaints:
         if isinstance(c.get("created_at"), datetime):
@@ -485,7 +505,9 @@ def department_dashboard(dept_name):
         "department_dashboard.html",
         department=dept_name,
         complaints=complaints,
-        total=total, pending=pending, in_progress=in_progress, resolved=resolved
+        total=total, pending=pending, in_progress=in_progress, resolved=resolved,
+        next_cursor=next_cursor,
+        page_args=page_args
     )
 
 # ---- SUBMIT COMPLAINT ----
@@ -498,9 +520,6 @@ def submit_complaint():
     description = request.form["description"].strip()
     location_text = request.form.get("location_text")  # manual location text
 
-    # ✅ ML prediction
-    department = predict_department(title, description)
-
     # ✅ Extract location (GPS or manual)
     gps_location = request.form.get("location")  # "lat,lng" or empty
     latitude = None
@@ -516,22 +535,20 @@ def submit_complaint():
         latitude = None
         longitude = None
 
-    # ✅ Handle image upload
-    image_file = request.files.get("attachment")
-    filename = None
-    if image_file and allowed_file(image_file.filename):
-        filename = secure_filename(image_file.filename)
-        os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-        image_file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+    # ✅ Handle image upload (an attachment that is not an image rejects the complaint)
+    attachment = request.files.get("attachment")
+    filename = save_upload(attachment, app.config["UPLOAD_FOLDER"])
+    if attachment and attachment.filename and not filename:
+        flash_not_an_image()
+        return redirect(url_for("user_dashboard"))
+    thumbnailer.submit(filename)
 
-    # Insert complaint into MongoDB
-    db = get_db()
-    db.complaints.insert_one({
+    # Insert complaint; the department is classified in the background
+    classification_queue.submit({
         "user_id": session["user_id"],
         "user_name": session["name"],
         "title": title,
         "description": description,
-        "department": department,
         "status": "Pending",
         "created_at": datetime.now().isoformat(),
         "image": filename,
@@ -544,6 +561,7 @@ def submit_complaint():
         "remarks": None,
         "admin_image": None
     })
+    stats_cache.record_new_complaint("Pending")
 
     flash("✅ Complaint submitted successfully! The admin will assign a worker soon.", "success")
     return redirect(url_for("user_dashboard"))
@@ -561,12 +579,11 @@ def upload_admin_image(complaint_id):
         flash("No image selected!", "danger")
         return redirect(url_for("admin_dashboard"))
 
-    filename = secure_filename(image_file.filename)
-
-    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-
-    image_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    image_file.save(image_path)
+    filename = save_upload(image_file, app.config["UPLOAD_FOLDER"])
+    if not filename:
+        flash_not_an_image()
+        return redirect(url_for("admin_dashboard"))
+    thumbnailer.submit(filename)
 
     db = get_db()
     db.complaints.update_one(
@@ -589,10 +606,13 @@ def update_status(complaint_id):
         return redirect(url_for("admin_dashboard"))
 
     db = get_db()
+    complaint = db.complaints.find_one({"id": complaint_id}, {"status": 1})
     db.complaints.update_one(
         {"id": complaint_id},
         {"$set": {"status": new_status}}
     )
+    if complaint:
+        stats_cache.record_status_change(complaint["status"], new_status)
 
     flash(f"Complaint #{complaint_id} status updated to {new_status}", "success")
     return redirect(url_for("admin_dashboard"))
@@ -647,7 +667,7 @@ def assign_worker():
     db = get_db()
 
     # Fetch worker details
-    worker = db.workers.find_one({"id": int(worker_id)})
+    worker = db.workers.find_one({"id": int(worker_id)}, {"name": 1, "phone": 1})
     
     if not worker:
         flash("Invalid worker selected!", "danger")
@@ -670,6 +690,7 @@ def assign_worker():
 def set_language(lang):
     if lang in ['en', 'kn', 'hi', 'te', 'ta']:
         session['lang'] = lang
+        g.translate = i18n.translator(lang)
         session.modified = True  # Force session to save
         print(f"Language set to: {lang}")  # Debug print
     return redirect(request.referrer or url_for("home"))
@@ -691,11 +712,11 @@ def feedback():
         complaint_id = request.form.get("complaint_id") or None
 
         image_file = request.files.get("image")
-        filename = None
-        if image_file and allowed_file(image_file.filename):
-            filename = secure_filename(image_file.filename)
-            os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-            image_file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+        filename = save_upload(image_file, app.config["UPLOAD_FOLDER"])
+        if image_file and image_file.filename and not filename:
+            flash_not_an_image()
+            return redirect(url_for("feedback"))
+        thumbnailer.submit(filename)
 
         db.feedback.insert_one({
             "user_id": session["user_id"],
@@ -730,7 +751,7 @@ def feedback():
     ]))
 
     # Fetch user's complaints for dropdown
-    complaints = list(db.complaints.find({"user_id": session["user_id"]}))
+    complaints = list(db.complaints.find({"user_id": session["user_id"]}, ["id", "title"]))
     # SQLite already has 'id' field
 
     return render_template("feedback.html", feedbacks=feedbacks, complaints=complaints)
@@ -805,6 +826,8 @@ def admin_feedback():
         "avg_rating": 0, "total_feedback": 0,
         "five_star": 0, "four_star": 0, "three_star": 0, "two_star": 0, "one_star": 0
     }
+    if analytics.get("avg_rating"):
+        analytics["avg_rating"] = round(analytics["avg_rating"], 1)
 
     return render_template("admin_feedback.html", feedbacks=all_feedbacks, analytics=analytics)
 
@@ -830,8 +853,7 @@ def dept_admin_login():
         db = get_db()
         
         # Debug: Check total admins
-        all_admins = db.dept_admins.find()
-        print(f"DEBUG: Total dept admins in DB: {len(all_admins)}")
+        print(f"DEBUG: Total dept admins in DB: {db.dept_admins.count_documents({})}")
         
         admin = db.dept_admins.find_one({"username": username})
         print(f"DEBUG: Looking for username '{username}', found: {admin is not None}")
@@ -896,68 +918,45 @@ def dept_admin_dashboard():
 
     db = get_db()
 
-    # Fetch complaints for this department (simplified for SQLite)
-    complaints = list(db.complaints.find({"department": department}))
-    
-    # Manually add user and worker info
-    for complaint in complaints:
-        # Add user info
-        if complaint.get("user_id"):
-            try:
-                user_id = int(complaint["user_id"]) if str(complaint["user_id"]).isdigit() else None
-                if user_id:
-                    user = db.users.find_one({"id": user_id})
-                    if user:
-                        complaint["user_name"] = user.get("name")
-            except (ValueError, TypeError):
-                pass
+    # One page of this department's complaints with user and worker info (single JOIN)
+    query, page_size, cursor, page_args = page_filters("status")
+    query["department"] = department
+    complaints, next_cursor = db.complaints.find_page_with_details(query, page_size, cursor)
+
+    # Statistics (one GROUP BY status pass)
+    counts = db.complaints.status_counts({"department": department})
+    total = counts["total"]
+    pending = counts["pending"]
+    in_progress = counts["in_progress"]
+    resolved = counts["resolved"]
+
+    # The worker list and trend chart are cached template fragments; these
+    # loaders only run when the cached copy is stale
+    def load_workers():
+        # Fetch workers for this department (simplified for SQLite)
+        workers = list(db.workers.find({"department": department}))
         
-        # Add worker info
-        if complaint.get("assigned_worker_id"):
-            try:
-                worker_id = int(complaint["assigned_worker_id"])
-                worker = db.workers.find_one({"id": worker_id})
-                if worker:
-                    complaint["assigned_worker_name"] = worker.get("name")
-                    complaint["assigned_worker_phone"] = worker.get("phone")
-            except (ValueError, TypeError):
-                pass
-    
-    # Sort by created_at
-    complaints.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-
-    # Statistics
-    total = db.complaints.count_documents({"department": department})
-    pending = db.complaints.count_documents({"department": department, "status": "Pending"})
-    in_progress = db.complaints.count_documents({"department": department, "status": "In Progress"})
-    resolved = db.complaints.count_documents({"department": department, "status": "Resolved"})
-
-    # Fetch workers for this department (simplified for SQLite)
-    workers = list(db.workers.find({"department": department}))
-    
-    # Add complaint counts manually
-    for worker in workers:
-        worker_complaints = db.complaints.count_documents({
-            "assigned_worker_id": str(worker["id"])
-        })
-        worker["complaint_count"] = worker_complaints
-    
-    # Sort by name
-    workers.sort(key=lambda x: x.get("name", ""))
-
-    # Monthly trend data (simplified for SQLite)
-    dept_complaints = list(db.complaints.find({"department": department}))
-    trend_dict = {}
-    for c in dept_complaints:
-        if c.get("created_at"):
-            month = str(c["created_at"])[:7] if isinstance(c["created_at"], str) else ""
-            if month:
-                trend_dict[month] = trend_dict.get(month, 0) + 1
-    
-    # Sort and limit to last 6 months
-    trend_items = sorted(trend_dict.items())[-6:] if trend_dict else []
-    trend_labels = [item[0] for item in trend_items]
-    trend_data = [item[1] for item in trend_items]
+        # Add complaint counts (one GROUP BY over this department's workers only)
+        worker_counts = dict(db.complaints.count_by(
+            "assigned_worker_id", {"assigned_worker_id": {"$in": [str(w["id"]) for w in workers]}}
+        ))
+        for worker in workers:
+            worker["complaint_count"] = worker_counts.get(str(worker["id"]), 0)
+        
+        # Sort by name
+        workers.sort(key=lambda x: x.get("name", ""))
+        return workers
+
+    def load_trend():
+        # Monthly trend data (grouped in SQL, last 6 months) -> (labels, counts)
+        trend_rows = db.complaints.aggregate([
+            {"$match": {"department": department}},
+            {"$group": {"_id": {"$substr": ["$created_at", 0, 7]}, "count": {"$sum": 1}}},
+            {"$sort": {"_id": -1}},
+            {"$limit": 6}
+        ])
+        trend_items = sorted((row["_id"], row["count"]) for row in trend_rows if row["_id"])
+        return [item[0] for item in trend_items], [item[1] for item in trend_items]
 
     # Format timestamps
     for c in complaints:
@@ -975,13 +974,14 @@ def dept_admin_dashboard():
         department=department,
         admin_name=admin_name,
         complaints=complaints,
-        workers=workers,
+        load_workers=load_workers,
         total=total,
         pending=pending,
         in_progress=in_progress,
         resolved=resolved,
-        trend_labels=trend_labels,
-        trend_data=trend_data
+        load_trend=load_trend,
+        next_cursor=next_cursor,
+        page_args=page_args
     )
 
 
@@ -998,6 +998,7 @@ def dept_update_status(complaint_id):
         return redirect(url_for("dept_admin_dashboard"))
 
     db = get_db()
+    complaint = db.complaints.find_one({"id": complaint_id}, {"status": 1})
     
     if remarks:
         db.complaints.update_one(
@@ -1009,6 +1010,8 @@ def dept_update_status(complaint_id):
             {"id": complaint_id},
             {"$set": {"status": new_status}}
         )
+    if complaint:
+        stats_cache.record_status_change(complaint["status"], new_status)
 
     flash(f"Complaint #{complaint_id} updated to {new_status}", "success")
     return redirect(url_for("dept_admin_dashboard"))
@@ -1026,10 +1029,11 @@ def dept_upload_admin_image(complaint_id):
         flash("No image selected!", "danger")
         return redirect(url_for("dept_admin_dashboard"))
 
-    filename = secure_filename(image_file.filename)
-    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-    image_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    image_file.save(image_path)
+    filename = save_upload(image_file, app.config["UPLOAD_FOLDER"])
+    if not filename:
+        flash_not_an_image()
+        return redirect(url_for("dept_admin_dashboard"))
+    thumbnailer.submit(filename)
 
     db = get_db()
     db.complaints.update_one(
@@ -1139,19 +1143,19 @@ def dept_admin_feedback():
 def api_stats():
     """API endpoint to provide complaint statistics"""
     try:
-        db = get_db()
-        
-        total = db.complaints.count_documents({})
-        resolved = db.complaints.count_documents({"status": {"$regex": "resolved", "$options": "i"}})
-        pending = db.complaints.count_documents({"status": {"$regex": "pending", "$options": "i"}})
-        in_progress = db.complaints.count_documents({"status": {"$regex": "in progress", "$options": "i"}})
+        counts = stats_cache.get()
         
-        return {
-            "total": total,
-            "resolved": resolved,
-            "pending": pending,
-            "in_progress": in_progress
-        }
+        response = jsonify({
+            "total": counts["total"],
+            "resolved": counts["resolved"],
+            "pending": counts["pending"],
+            "in_progress": counts["in_progress"]
+        })
+        # Let browsers and CDNs reuse the payload until the cache TTL expires
+        response.set_etag(stats_cache.etag(counts))
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.STATS_CACHE_TTL
+        return response.make_conditional(request)
     except Exception as e:
         return {
             "total": 0,
@@ -1161,6 +1165,17 @@ def api_stats():
             "error": str(e)
         }, 500
 
+# ---- STARTUP ----
+# The model loads in the background (ML_WARMUP=0 defers it to the first
+# prediction); pages are served with the keyword fallback until it is ready.
+if os.environ.get("ML_WARMUP", "1") == "1":
+    warm_up_async()
+# Resume classification jobs left pending by a previous run
+classification_queue.start()
+
+APP_BOOT_SECONDS = round(time.perf_counter() - _boot_started, 3)
+print(f"✅ App ready in {APP_BOOT_SECONDS}s")
+
 # ---- RUN APP ----
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,170 @@
+"""
+Background department classification for new complaints
+
+submit_complaint stores the complaint straight away with a provisional
+department from the keyword classifier and records a row in the durable
+classification_jobs table. A worker thread claims pending jobs in batches,
+runs the model and replaces the provisional department. Jobs survive
+restarts: anything still pending (or claimed by a worker that died) is
+picked up again once its lease expires.
+"""
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from database_sqlite import bump_data_version, get_db, get_db_connection, get_write_connection
+from ml.keywords import keyword_classifier
+from ml.router import ML_AVAILABLE, load_model, predict_department, predict_departments
+
+
+class ClassificationQueue:
+    """Durable SQLite-backed job queue with one worker thread per process"""
+
+    def __init__(self, enabled=True, batch_size=16, poll_interval=5.0, max_attempts=3, lease_seconds=300):
+        # Without the ML libraries the keyword answer is final, so skip the queue
+        self.enabled = enabled and ML_AVAILABLE
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+        self.changed = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread (again after a fork); resumes pending jobs"""
+        if not self.enabled:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="classification-worker", daemon=True)
+                self._thread.start()
+
+    def submit(self, complaint):
+        """Insert a complaint and queue it for classification; returns its id"""
+        title, description = complaint["title"], complaint["description"]
+        if not self.enabled:
+            complaint = dict(complaint, department=predict_department(title, description))
+            return get_db().complaints.insert_one(complaint).inserted_id
+
+        provisional = keyword_classifier.classify(title, description)
+        complaint = dict(complaint, department=provisional)
+        with get_write_connection() as conn:
+            complaint_id = get_db().complaints.insert_one(complaint).inserted_id
+            conn.execute(
+                "INSERT INTO classification_jobs (complaint_id, provisional_department) VALUES (?, ?)",
+                (complaint_id, provisional)
+            )
+        self.start()
+        self._wake.set()
+        return complaint_id
+
+    def _claim(self):
+        """Atomically mark a batch of pending (or abandoned) jobs as running"""
+        now = time.time()
+        with get_write_connection() as conn:
+            # A worker died during the last allowed attempt: give up on the job
+            abandoned = conn.execute('''
+                UPDATE classification_jobs
+                SET status = 'failed', error = 'lease expired after the last attempt', finished_at = ?
+                WHERE status = 'running' AND claimed_at < ? AND attempts >= ?
+            ''', (datetime.now().isoformat(), now - self.lease_seconds, self.max_attempts)).rowcount
+            self.failed += abandoned
+            jobs = conn.execute('''
+                SELECT j.id, j.complaint_id, j.attempts, j.provisional_department, c.title, c.description
+                FROM classification_jobs j
+                JOIN complaints c ON c.id = j.complaint_id
+                WHERE (j.status = 'pending' OR (j.status = 'running' AND j.claimed_at < ?))
+                  AND j.attempts < ?
+                ORDER BY j.id
+                LIMIT ?
+            ''', (now - self.lease_seconds, self.max_attempts, self.batch_size)).fetchall()
+            conn.executemany(
+                "UPDATE classification_jobs SET status = 'running', attempts = attempts + 1, claimed_at = ? WHERE id = ?",
+                [(now, job["id"]) for job in jobs]
+            )
+        return jobs
+
+    def _complete(self, jobs, departments):
+        finished_at = datetime.now().isoformat()
+        with get_write_connection() as conn:
+            # Leave the complaint alone if its department was changed meanwhile
+            conn.executemany(
+                "UPDATE complaints SET department = ? WHERE id = ? AND department IS ?",
+                [(dept, job["complaint_id"], job["provisional_department"]) for job, dept in zip(jobs, departments)]
+            )
+            conn.executemany(
+                "UPDATE classification_jobs SET status = 'done', department = ?, error = NULL, finished_at = ? WHERE id = ?",
+                [(dept, finished_at, job["id"]) for job, dept in zip(jobs, departments)]
+            )
+            bump_data_version(conn, "complaints")
+        self.processed += len(jobs)
+        self.changed += sum(dept != job["provisional_department"] for job, dept in zip(jobs, departments))
+
+    def _fail(self, jobs, error):
+        print(f"❌ Classification failed for {len(jobs)} complaint(s): {error}")
+        with get_write_connection() as conn:
+            conn.executemany(
+                "UPDATE classification_jobs SET status = ?, error = ? WHERE id = ?",
+                [
+                    ("failed" if job["attempts"] + 1 >= self.max_attempts else "pending", str(error), job["id"])
+                    for job in jobs
+                ]
+            )
+        self.failed += sum(job["attempts"] + 1 >= self.max_attempts for job in jobs)
+
+    def _process(self, jobs):
+        try:
+            departments = predict_departments([(job["title"], job["description"]) for job in jobs])
+            self._complete(jobs, departments)
+        except Exception as e:
+            # Model or database error (e.g. "database is locked"): retry later
+            self._fail(jobs, e)
+
+    def _run(self):
+        # Wait for a background warm-up rather than classifying with the fallback
+        load_model()
+        while True:
+            try:
+                jobs = self._claim()
+                if jobs:
+                    self._process(jobs)
+                    continue
+            except Exception as e:
+                # Anything _fail could not record is picked up again once its lease expires
+                print(f"❌ Classification queue error: {e}")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def stats(self):
+        """Worker counters plus job counts by status"""
+        by_status = {}
+        if self.enabled:
+            with get_db_connection() as conn:
+                by_status = dict(conn.execute(
+                    "SELECT status, COUNT(*) FROM classification_jobs GROUP BY status"
+                ).fetchall())
+        return {
+            "enabled": self.enabled,
+            "worker_alive": self._thread is not None and self._thread.is_alive(),
+            "processed": self.processed,
+            "changed": self.changed,
+            "failed": self.failed,
+            "jobs": by_status,
+        }
+
+
+classification_queue = ClassificationQueue(
+    enabled=Config.CLASSIFY_ASYNC,
+    batch_size=Config.CLASSIFY_BATCH_SIZE,
+    poll_interval=Config.CLASSIFY_POLL_INTERVAL,
+    max_attempts=Config.CLASSIFY_MAX_ATTEMPTS,
+    lease_seconds=Config.CLASSIFY_LEASE_SECONDS,
+)
@@ -20,10 +20,65 @@ class Config:
         password = quote_plus(Config.MONGODB_PASSWORD)
         return f"mongodb+srv://{username}:{password}@{Config.MONGODB_CLUSTER}/{Config.MONGODB_DATABASE}?retryWrites=true&w=majority"
     
+    # SQLite connection pool (one checkout per request thread)
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 4))
+    SQLITE_POOL_TIMEOUT = float(os.environ.get('SQLITE_POOL_TIMEOUT', 10))
+    SQLITE_HEALTH_CHECK_INTERVAL = float(os.environ.get('SQLITE_HEALTH_CHECK_INTERVAL', 30))
+
+    # Per-connection SQLite settings ('' skips a pragma). cache_size is in
+    # pages, or KiB when negative; mmap_size is in bytes.
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')
+    SQLITE_MMAP_SIZE = os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = os.environ.get('SQLITE_CACHE_SIZE', '-16000')
+
+    # Prepared statements kept per connection by sqlite3, and SQL compiled
+    # per query shape by SQLiteDB in front of it (0 disables the latter)
+    SQLITE_CACHED_STATEMENTS = int(os.environ.get('SQLITE_CACHED_STATEMENTS', 256))
+    SQL_SHAPE_CACHE_SIZE = int(os.environ.get('SQL_SHAPE_CACHE_SIZE', 512))
+
+    # Public stats cache (landing page and /api/stats), in seconds
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 30))
+
+    # Dashboard complaint listings (keyset pagination)
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+
+    # Background department classification (CLASSIFY_ASYNC=0 classifies inline)
+    CLASSIFY_ASYNC = os.environ.get('CLASSIFY_ASYNC', '1') == '1'
+    CLASSIFY_BATCH_SIZE = int(os.environ.get('CLASSIFY_BATCH_SIZE', 16))
+    CLASSIFY_POLL_INTERVAL = float(os.environ.get('CLASSIFY_POLL_INTERVAL', 5))
+    CLASSIFY_MAX_ATTEMPTS = int(os.environ.get('CLASSIFY_MAX_ATTEMPTS', 3))
+    CLASSIFY_LEASE_SECONDS = int(os.environ.get('CLASSIFY_LEASE_SECONDS', 300))
+
+    # Rendered template fragments (worker lists, charts), invalidated by data version
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))
+
     # Upload folder
     UPLOAD_FOLDER = "static/uploads"
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
+    MAX_IMAGE_SIZE = int(os.environ.get('MAX_IMAGE_SIZE', 8 * 1024 * 1024))  # per uploaded image
+
+    # Dashboard image variants (longest side in pixels), built in the background
+    THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE', 320))
+    LARGE_IMAGE_SIZE = int(os.environ.get('LARGE_IMAGE_SIZE', 1280))
+    THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', 80))
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
     
+    # Static files: max-age for unversioned URLs and for ?v=<hash> URLs,
+    # plus optional hand-off of file bytes to the front-end web server
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 300))
+    STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', 365 * 24 * 3600))
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '0') == '1'
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+
     # Babel configuration
     BABEL_DEFAULT_LOCALE = 'en'
     LANGUAGES = ['en', 'kn', 'hi', 'te', 'ta']
+
+    # Compiled translation catalog, rebuilt when translations.py changes ('' disables)
+    I18N_CACHE_FILE = os.environ.get(
+        'I18N_CACHE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations.marshal')
+    )
@@ -1,23 +1,364 @@
 import sqlite3
+import base64
 from datetime import datetime
 import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
+from config import Config
 
 DATABASE_FILE = "icgs_complaints.db"
 
+# Applied to every new connection. WAL lets readers proceed while a write is
+# in progress; synchronous=NORMAL is durable in WAL mode except on power loss.
+CONNECTION_PRAGMAS = [
+    f"PRAGMA {name} = {value}"
+    for name, value in [
+        ("journal_mode", Config.SQLITE_JOURNAL_MODE),
+        ("synchronous", Config.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", Config.SQLITE_BUSY_TIMEOUT_MS),
+        ("mmap_size", Config.SQLITE_MMAP_SIZE),
+        ("cache_size", Config.SQLITE_CACHE_SIZE),
+    ]
+    if value != ""
+]
+
+def _regexp(pattern, value):
+    """SQLite REGEXP function: `value REGEXP pattern` calls regexp(pattern, value)"""
+    # Like Mongo, a regex never matches a missing or non-string value
+    if not isinstance(value, str):
+        return False
+    return re.search(pattern, value) is not None
+
+class ConnectionPool:
+    """Thread-aware pool of reusable SQLite connections"""
+    
+    def __init__(self, database, size=4, timeout=10.0, health_check_interval=30.0, cached_statements=128):
+        self.database = database
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        """Drop all pool state (used on first use and after a fork)"""
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        # One writer per process; other processes wait in BEGIN IMMEDIATE
+        self._write_lock = threading.RLock()
+        self._open = 0
+        self._in_use = 0
+        self.metrics = {
+            "created": 0,
+            "reused": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "health_checks": 0,
+            "discarded": 0,
+            "writes": 0,
+            "write_waits": 0,
+            "write_wait_time_ms": 0.0,
+        }
+    
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database, timeout=self.timeout, check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.create_function("regexp", 2, _regexp, deterministic=True)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _is_healthy(self, conn):
+        self.metrics["health_checks"] += 1
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _discard(self, conn):
+        with self._lock:
+            self._open -= 1
+            self.metrics["discarded"] += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def acquire(self):
+        """Check out a connection, opening a new one while below the pool size"""
+        if self._pid != os.getpid():
+            # Connections must never be shared with a forked gunicorn worker
+            with self._lock:
+                self._reset()
+        
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open < self.size
+                    if can_open:
+                        self._open += 1
+                if can_open:
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._open -= 1
+                        raise
+                    with self._lock:
+                        self.metrics["created"] += 1
+                        self.metrics["checkouts"] += 1
+                        self._in_use += 1
+                    return conn
+                
+                started = time.monotonic()
+                try:
+                    conn, last_used = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"connection pool exhausted ({self.size} connections in use)"
+                    )
+                with self._lock:
+                    self.metrics["waits"] += 1
+                    self.metrics["wait_time_ms"] += (time.monotonic() - started) * 1000
+            
+            if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            
+            with self._lock:
+                self.metrics["reused"] += 1
+                self.metrics["checkouts"] += 1
+                self._in_use += 1
+            return conn
+    
+    def release(self, conn):
+        """Return a connection to the pool, discarding it if it is broken"""
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+    
+    @contextmanager
+    def reader(self):
+        """Yield a connection for a long read, e.g. an open Cursor
+
+        Reuses the thread's current connection when there is one (so the read
+        sees that transaction's writes); otherwise checks out a connection
+        that is not registered as the thread's, so statements run while the
+        caller iterates keep their own commit/rollback.
+        """
+        held = getattr(self._local, "conn", None) if self._pid == os.getpid() else None
+        if held is not None:
+            yield held
+            return
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    @contextmanager
+    def connection(self):
+        """Yield (conn, outermost); nested calls in one thread share a connection"""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held, False
+            return
+        
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield conn, True
+        finally:
+            self._local.conn = None
+            self.release(conn)
+    
+    @contextmanager
+    def writer(self):
+        """Like connection(), while holding this process's write lock"""
+        with self.connection() as (conn, outermost):
+            # Take the lock after the connection so a writer never waits on the pool
+            if not self._write_lock.acquire(blocking=False):
+                started = time.monotonic()
+                if not self._write_lock.acquire(timeout=self.timeout):
+                    raise sqlite3.OperationalError("timed out waiting for the write lock")
+                with self._lock:
+                    self.metrics["write_waits"] += 1
+                    self.metrics["write_wait_time_ms"] += (time.monotonic() - started) * 1000
+            try:
+                with self._lock:
+                    self.metrics["writes"] += 1
+                yield conn, outermost
+            finally:
+                self._write_lock.release()
+    
+    def stats(self):
+        """Snapshot of pool metrics"""
+        with self._lock:
+            return dict(
+                self.metrics,
+                size=self.size,
+                open=self._open,
+                in_use=self._in_use,
+                idle=self._idle.qsize(),
+            )
+    
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+pool = ConnectionPool(
+    DATABASE_FILE,
+    size=Config.SQLITE_POOL_SIZE,
+    timeout=Config.SQLITE_POOL_TIMEOUT,
+    health_check_interval=Config.SQLITE_HEALTH_CHECK_INTERVAL,
+    cached_statements=Config.SQLITE_CACHED_STATEMENTS,
+)
+
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
+    """Context manager for pooled database connections"""
+    with pool.connection() as (conn, outermost):
+        if not outermost:
+            # The enclosing get_db_connection() owns commit/rollback
+            yield conn
+            return
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+@contextmanager
+def get_write_connection():
+    """Context manager for mutations: serialized per process, BEGIN IMMEDIATE"""
+    with pool.writer() as (conn, outermost):
+        if not conn.in_transaction:
+            # Take SQLite's write lock up front instead of upgrading a read
+            # transaction later, which fails with "database is locked"
+            conn.execute("BEGIN IMMEDIATE")
+        if not outermost:
+            yield conn
+            return
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+def get_pool_stats():
+    """Connection pool and statement cache metrics for monitoring"""
+    return dict(pool.stats(), statements=statement_cache.stats())
+
+class StatementCache:
+    """Bounded LRU of SQL compiled per (table, operation, query shape)
+    
+    The generated SQL text only depends on the shape of a query (its fields,
+    operators and a few SQL-changing operands such as regex patterns), not
+    on the values bound to it. Reusing the same text also lets sqlite3 reuse
+    the statement it already prepared on each pooled connection.
+    """
+    
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+statement_cache = StatementCache(max_entries=Config.SQL_SHAPE_CACHE_SIZE)
+
+class _Param:
+    """Placeholder for a bound query value while its statement is compiled"""
+    __slots__ = ("index",)
+    
+    def __init__(self, index):
+        self.index = index
+
+# Operands that change the generated SQL itself rather than a bound value
+_SHAPE_OPERANDS = ("$regex", "$options", "$exists")
+
+def _parameterize(value, values, op=None):
+    """Split a query into (query with placeholders, hashable shape), collecting its bound values"""
+    if isinstance(value, dict):
+        marked, shape = {}, []
+        for key, item in value.items():
+            marked[key], item_shape = _parameterize(item, values, key)
+            shape.append((key, item_shape))
+        return marked, ("{", tuple(shape))
+    if isinstance(value, (list, tuple, set)):
+        parts = [_parameterize(item, values, op) for item in value]
+        return [marked for marked, _ in parts], ("[", tuple(shape for _, shape in parts))
+    if value is None or op in _SHAPE_OPERANDS or isinstance(value, re.Pattern):
+        return value, ("=", value)
+    values.append(value)
+    return _Param(len(values) - 1), "?"
+
+def encode_cursor(created_at, row_id):
+    """Opaque, URL-safe keyset cursor for a (created_at, id) position"""
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); raises ValueError for malformed tokens"""
     try:
-        yield conn
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid page cursor: {token!r}") from e
+    if not isinstance(row_id, int):
+        raise ValueError(f"Invalid page cursor: {token!r}")
+    return created_at, row_id
 
 def init_db():
     """Initialize SQLite database with tables"""
@@ -100,6 +441,103 @@ def init_db():
         
         conn.commit()
         print("✅ SQLite database initialized successfully!")
+    
+    run_migrations()
+
+# ---- SCHEMA MIGRATIONS ----
+# (version, description, statements). Append new versions at the end and
+# never edit a migration that has already been deployed.
+MIGRATIONS = [
+    (1, "Indexes for dashboard filters and created_at ordering", [
+        "CREATE INDEX IF NOT EXISTS idx_complaints_dept_status_created ON complaints (department, status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_dept_created ON complaints (department, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_status_created ON complaints (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_user_created ON complaints (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_worker ON complaints (assigned_worker_id)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_created ON complaints (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_user_created ON feedback (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_complaint ON feedback (complaint_id)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_created ON feedback (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_workers_department_name ON workers (department, name)",
+    ]),
+    (2, "Covering index for per-user status counts", [
+        "CREATE INDEX IF NOT EXISTS idx_complaints_user_status ON complaints (user_id, status)",
+    ]),
+    (3, "Durable job table for background department classification", [
+        """
+        CREATE TABLE IF NOT EXISTS classification_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            complaint_id INTEGER NOT NULL UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            provisional_department TEXT,
+            department TEXT,
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            claimed_at REAL,
+            finished_at TEXT,
+            FOREIGN KEY (complaint_id) REFERENCES complaints (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_classification_jobs_status ON classification_jobs (status, id)",
+    ]),
+    (4, "Data version counters for template fragment caching", [
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO data_versions (name) VALUES ('complaints'), ('workers')",
+    ]),
+]
+
+def get_schema_version():
+    """Return the highest applied migration version (0 for a fresh database)"""
+    with get_db_connection() as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+        ).fetchone()
+        if not exists:
+            return 0
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+def run_migrations():
+    """Apply pending schema migrations, one transaction per version"""
+    with get_db_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+        
+        pending = [m for m in sorted(MIGRATIONS) if m[0] not in applied]
+        applied_now = 0
+        for version, description, statements in pending:
+            # Another gunicorn worker booting at the same time may have
+            # applied it since the read above; check again under the lock
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+            applied_now += 1
+            print(f"✅ Applied migration {version}: {description}")
+        
+        if applied_now:
+            # Refresh planner statistics so the new indexes get picked up
+            conn.execute("ANALYZE")
+    
+    print(f"✅ Database schema at version {get_schema_version()}")
 
 def create_default_dept_admins():
     """Create default department admin accounts if they don't exist"""
@@ -206,117 +644,920 @@ def fix_dept_admins():
 create_default_dept_admins()
 fix_dept_admins()
 
+# Complaint status buckets reported by SQLiteDB.status_counts()
+STATUS_BUCKETS = {
+    "pending": "Pending",
+    "in_progress": "In Progress",
+    "resolved": "Resolved",
+}
+
+def status_buckets(status):
+    """Return the STATUS_BUCKETS keys a status value counts towards"""
+    status = (status or "").lower()
+    return [bucket for bucket, label in STATUS_BUCKETS.items() if label.lower() in status]
+
+# Tables whose writes invalidate cached template fragments (see fragment_cache.py)
+VERSIONED_TABLES = ("complaints", "workers")
+
+def bump_data_version(conn, name):
+    """Increment a data version counter inside the caller's transaction"""
+    conn.execute("UPDATE data_versions SET version = version + 1 WHERE name = ?", (name,))
+
+def get_data_versions():
+    """{name: version} for every versioned table"""
+    with get_db_connection() as conn:
+        return dict(conn.execute("SELECT name, version FROM data_versions").fetchall())
+
+ASCENDING = 1
+DESCENDING = -1
+
+class Cursor:
+    """Lazy result of SQLiteDB.find(), modelled on pymongo's Cursor
+
+    Nothing runs until iteration starts; rows are then fetched batch_size at
+    a time and converted to dicts one by one, so scans of large tables use
+    constant memory. sort/skip/limit/batch_size return the cursor for
+    chaining and must be called before iterating.
+    """
+    
+    def __init__(self, collection, query=None, projection=None):
+        self._collection = collection
+        self._query = query
+        self._columns = collection._projected_columns(projection)
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = 100
+        self._started = False
+    
+    def _check_not_started(self):
+        if self._started:
+            raise RuntimeError("cannot modify a cursor after iteration has started")
+    
+    def sort(self, key_or_list, direction=ASCENDING):
+        """sort("field", -1) or sort([("a", 1), ("b", -1)])"""
+        self._check_not_started()
+        keys = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        columns = self._collection.columns()
+        for key, key_direction in keys:
+            if key not in columns:
+                raise ValueError(f"Unknown sort field for {self._collection.table_name}: {key!r}")
+            self._sort.append(f"{key} {'DESC' if key_direction == DESCENDING else 'ASC'}")
+        return self
+    
+    def skip(self, count):
+        self._check_not_started()
+        self._skip = max(0, int(count))
+        return self
+    
+    def limit(self, count):
+        """Return at most count documents (0 means no limit)"""
+        self._check_not_started()
+        self._limit = max(0, int(count))
+        return self
+    
+    def batch_size(self, size):
+        self._check_not_started()
+        self._batch_size = max(1, int(size))
+        return self
+    
+    def _sql(self):
+        paged = bool(self._limit or self._skip)
+        
+        def build(query):
+            where_clause, params = self._collection._build_where(query)
+            sql = f"SELECT {', '.join(self._columns) if self._columns else '*'} FROM {self._collection.table_name} {where_clause}"
+            if self._sort:
+                sql += " ORDER BY " + ", ".join(self._sort)
+            if paged:
+                sql += " LIMIT ? OFFSET ?"
+            return sql, params
+        
+        sql, params = self._collection._statement(
+            "find", self._query, build, self._columns and tuple(self._columns), tuple(self._sort), paged
+        )
+        if paged:
+            params += [self._limit or -1, self._skip]
+        return sql, params
+    
+    def __iter__(self):
+        self._check_not_started()
+        self._started = True
+        sql, params = self._sql()
+        with pool.reader() as conn:
+            cursor = conn.execute(sql, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(self._batch_size)
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cursor.close()
+
 class SQLiteDB:
     """SQLite Database wrapper to mimic MongoDB interface"""
     
+    # Column names per table, read once from PRAGMA table_info
+    _column_cache = {}
+    
     def __init__(self, table_name):
         self.table_name = table_name
     
-    def find_one(self, query):
-        """Find one document"""
+    def columns(self):
+        """Return the column names of this table"""
+        columns = SQLiteDB._column_cache.get(self.table_name)
+        if columns is None:
+            with get_db_connection() as conn:
+                rows = conn.execute(f"PRAGMA table_info({self.table_name})").fetchall()
+            columns = [row["name"] for row in rows]
+            SQLiteDB._column_cache[self.table_name] = columns
+        return columns
+    
+    def find_one(self, query, projection=None):
+        """Find one document (projection as for find)"""
+        columns = self._projected_columns(projection)
+        
+        def build(query):
+            where_clause, params = self._build_where(query)
+            return f"SELECT {', '.join(columns) if columns else '*'} FROM {self.table_name} {where_clause} LIMIT 1", params
+        
+        sql, params = self._statement("find_one", query, build, columns and tuple(columns))
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            where_clause, params = self._build_where(query)
-            sql = f"SELECT * FROM {self.table_name} {where_clause} LIMIT 1"
             cursor.execute(sql, params)
             row = cursor.fetchone()
             return dict(row) if row else None
     
-    def find(self, query=None):
-        """Find all documents matching query"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            if query:
-                where_clause, params = self._build_where(query)
-                sql = f"SELECT * FROM {self.table_name} {where_clause}"
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(f"SELECT * FROM {self.table_name}")
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+    def find(self, query=None, projection=None):
+        """Return a lazy Cursor over the documents matching query"""
+        return Cursor(self, query, projection)
+    
+    def _projected_columns(self, projection):
+        """Column list for a projection ({field: 1}, {field: 0} or a list of fields); None selects all
+        
+        As in Mongo (and the $project stage), _id means the id column and is
+        kept by an inclusion projection unless excluded explicitly.
+        """
+        if not projection:
+            return None
+        if isinstance(projection, dict):
+            fields = {"id" if field == "_id" else field: keep for field, keep in projection.items()}
+        else:
+            fields = {"id" if field == "_id" else field: 1 for field in projection}
+        included = [field for field, keep in fields.items() if keep]
+        excluded = {field for field, keep in fields.items() if not keep}
+        columns = self.columns()
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown projection field(s) for {self.table_name}: {', '.join(unknown)}")
+        if included and excluded - {"id"}:
+            raise ValueError("Projection cannot mix inclusion and exclusion (except _id)")
+        if included:
+            if "id" in columns and "id" not in fields:
+                included.insert(0, "id")
+            return included
+        return [column for column in columns if column not in excluded]
     
     def insert_one(self, document):
         """Insert one document"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        def build(_):
             columns = ', '.join(document.keys())
             placeholders = ', '.join(['?' for _ in document])
-            sql = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+            return f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})", []
+        
+        sql, _ = self._statement("insert_one", None, build, tuple(document))
+        with get_write_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(sql, list(document.values()))
-            return type('Result', (), {'inserted_id': cursor.lastrowid})()
+            inserted_id = cursor.lastrowid
+            if self.table_name in VERSIONED_TABLES:
+                bump_data_version(conn, self.table_name)
+            return type('Result', (), {'inserted_id': inserted_id})()
     
     def update_one(self, query, update):
         """Update one document"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        if '$set' not in update:
+            return
+        set_data = update['$set']
+        
+        def build(query):
             where_clause, where_params = self._build_where(query)
-            
-            if '$set' in update:
-                set_data = update['$set']
-                set_clause = ', '.join([f"{k} = ?" for k in set_data.keys()])
-                sql = f"UPDATE {self.table_name} SET {set_clause} {where_clause}"
-                cursor.execute(sql, list(set_data.values()) + where_params)
+            set_clause = ', '.join([f"{k} = ?" for k in set_data.keys()])
+            return f"UPDATE {self.table_name} SET {set_clause} {where_clause}", where_params
+        
+        sql, where_params = self._statement("update_one", query, build, tuple(set_data))
+        with get_write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, list(set_data.values()) + where_params)
+            if cursor.rowcount and self.table_name in VERSIONED_TABLES:
+                bump_data_version(conn, self.table_name)
     
     def count_documents(self, query=None):
         """Count documents"""
+        def build(query):
+            where_clause, params = self._build_where(query)
+            return f"SELECT COUNT(*) FROM {self.table_name} {where_clause}", params
+        
+        sql, params = self._statement("count_documents", query, build)
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            if query:
-                where_clause, params = self._build_where(query)
-                sql = f"SELECT COUNT(*) FROM {self.table_name} {where_clause}"
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(f"SELECT COUNT(*) FROM {self.table_name}")
+            cursor.execute(sql, params)
             return cursor.fetchone()[0]
     
-    def aggregate(self, pipeline):
-        """Enhanced aggregation support for MongoDB-style queries"""
+    def count_by(self, field, query=None):
+        """Count documents per distinct value of field, largest groups first"""
+        def build(query):
+            where_clause, params = self._build_where(query)
+            return (
+                f"SELECT {field} AS value, COUNT(*) AS count FROM {self.table_name} {where_clause} "
+                f"GROUP BY {field} ORDER BY count DESC"
+            ), params
+        
+        sql, params = self._statement("count_by", query, build, field)
         with get_db_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [(row["value"], row["count"]) for row in cursor.fetchall()]
+    
+    def status_counts(self, query=None):
+        """Count documents per status bucket in a single GROUP BY pass
+        
+        Returns {"total", "pending", "in_progress", "resolved"}. Status values
+        are matched case-insensitively, like the old $regex/$options "i" counts.
+        """
+        counts = {"total": 0}
+        counts.update((bucket, 0) for bucket in STATUS_BUCKETS)
+        for status, count in self.count_by("status", query):
+            counts["total"] += count
+            for bucket in status_buckets(status):
+                counts[bucket] += count
+        return counts
+    
+    def find_with_details(self, query=None, limit=None, after=None):
+        """Find complaints joined with their user and worker in a single query
+        
+        Rows are ordered newest first (created_at, then id). after is a
+        (created_at, id) keyset position; only rows past it are returned.
+        """
+        if self.table_name != "complaints":
+            raise ValueError("find_with_details is only available for complaints")
+        
+        # Joined values win over the copies stored on the complaint row,
+        # matching the old per-complaint users/workers lookups
+        overrides = {
+            "user_name": "COALESCE(u.name, c.user_name)",
+            "assigned_worker_name": "COALESCE(w.name, c.assigned_worker_name)",
+            "assigned_worker_phone": "COALESCE(w.phone, c.assigned_worker_phone)",
+        }
+        def build(query):
+            select = [
+                f"{overrides[col]} AS {col}" if col in overrides else f"c.{col}"
+                for col in self.columns()
+            ]
+            select.append("w.department AS worker_department")
             
-            # Start with all records
-            sql = f"SELECT * FROM {self.table_name}"
-            params = []
-            
-            # Process pipeline stages
-            for stage in pipeline:
-                if "$match" in stage:
-                    where_clause, where_params = self._build_where(stage["$match"])
-                    if where_clause:
-                        sql += f" {where_clause}"
-                        params.extend(where_params)
-                
-                if "$sort" in stage:
-                    sort_field = list(stage["$sort"].keys())[0]
-                    sort_order = "DESC" if stage["$sort"][sort_field] == -1 else "ASC"
-                    sql += f" ORDER BY {sort_field} {sort_order}"
-                
-                if "$limit" in stage:
-                    sql += f" LIMIT {stage['$limit']}"
+            conditions, params = self._build_conditions(query, alias="c")
+            if after is not None:
+                conditions.append("(c.created_at < ? OR (c.created_at = ? AND c.id < ?))")
+            where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
             
+            sql = (
+                f"SELECT {', '.join(select)} FROM complaints c "
+                "LEFT JOIN users u ON u.id = c.user_id "
+                "LEFT JOIN workers w ON w.id = c.assigned_worker_id "
+                f"{where_clause} ORDER BY c.created_at DESC, c.id DESC"
+            )
+            if limit is not None:
+                sql += " LIMIT ?"
+            return sql, params
+        
+        sql, params = self._statement("find_with_details", query, build, after is not None, limit is not None)
+        if after is not None:
+            created_at, row_id = after
+            params += [created_at, created_at, row_id]
+        if limit is not None:
+            params.append(limit)
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(sql, params)
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def find_page_with_details(self, query=None, page_size=50, cursor=None):
+        """Keyset-paginated find_with_details
+        
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        The cost of a page does not depend on how deep into the listing it is.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        rows = self.find_with_details(query, limit=page_size + 1, after=after)
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
     
-    def _build_where(self, query):
+    def aggregate(self, pipeline):
+        """Run a MongoDB-style aggregation pipeline as a single SQL statement"""
+        # Pipeline values are mostly field paths, so cache on the exact pipeline
+        key = (self.table_name, "aggregate", json.dumps(pipeline, default=repr))
+        compiled = statement_cache.get(key)
+        if compiled is None:
+            compiled = _PipelineCompiler(self).compile(pipeline)
+            statement_cache.put(key, compiled)
+        sql, params, json_fields = compiled
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        # $push/$addToSet and compound group keys come back as JSON text
+        for row in rows:
+            for field in json_fields:
+                if isinstance(row.get(field), str):
+                    row[field] = json.loads(row[field])
+        return rows
+    
+    def _statement(self, op, query, build, *shape):
+        """(sql, params) for a statement, compiled once per query shape
+        
+        build(query) returns (sql, params) for a copy of the query whose values
+        are placeholders; shape lists whatever else changes the SQL text
+        (columns, sort keys, optional clauses).
+        """
+        values = []
+        marked, query_shape = _parameterize(query or {}, values)
+        key = (self.table_name, op, query_shape) + shape
+        compiled = statement_cache.get(key)
+        if compiled is None:
+            compiled = build(marked)
+            statement_cache.put(key, compiled)
+        sql, template = compiled
+        return sql, [values[p.index] if type(p) is _Param else p for p in template]
+    
+    def _build_where(self, query, alias=None, resolve=None):
         """Build WHERE clause from query dict"""
+        conditions, params = self._build_conditions(query, alias, resolve)
+        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return where_clause, params
+    
+    def _build_conditions(self, query, alias=None, resolve=None):
+        """Build the list of SQL conditions (and their params) for a query dict
+        
+        Supports equality (None matches NULL), $eq, $ne, $gt, $gte, $lt, $lte,
+        $in, $nin, $exists, $not, $regex/$options and top-level $and, $or and
+        $nor. resolve, when given, maps a field name to a (sql, params)
+        expression; otherwise field names are used as columns, optionally
+        alias-qualified.
+        """
         if not query:
-            return "", []
+            return [], []
         
         conditions = []
         params = []
         
         for key, value in query.items():
-            if isinstance(value, dict):
-                if '$regex' in value:
-                    conditions.append(f"{key} LIKE ?")
-                    params.append(f"%{value['$regex']}%")
+            if key in ("$and", "$or", "$nor"):
+                sql, clause_params = self._logical_condition(key, value, alias, resolve)
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported query operator: {key}")
             else:
-                conditions.append(f"{key} = ?")
-                params.append(value)
+                if resolve:
+                    column, column_params = resolve(key)
+                else:
+                    column, column_params = (f"{alias}.{key}" if alias else key), []
+                sql, clause_params = _field_condition(column, column_params, value)
+            conditions.append(sql)
+            params.extend(clause_params)
         
-        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
-        return where_clause, params
+        return conditions, params
+    
+    def _logical_condition(self, op, clauses, alias, resolve):
+        if not isinstance(clauses, (list, tuple)) or not clauses:
+            raise ValueError(f"{op} needs a non-empty list of queries")
+        parts = []
+        for clause in clauses:
+            conditions, params = self._build_conditions(clause, alias, resolve)
+            parts.append((" AND ".join(conditions) or "1", params))
+        sql, params = _join_sql([(f"({sql})", params) for sql, params in parts], " AND " if op == "$and" else " OR ")
+        return (f"NOT ({sql})" if op == "$nor" else f"({sql})"), params
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Id conversions that are dropped inside $lookup join conditions: SQLite's
+# column affinity already compares an INTEGER id with a TEXT reference
+# column numerically, and a bare column keeps the rowid lookup usable.
+_ID_CONVERSIONS = ("$toString", "$toObjectId", "$toInt", "$toLong")
+
+_CASTS = {
+    "$toString": "TEXT",
+    "$toObjectId": "INTEGER",
+    "$toInt": "INTEGER",
+    "$toLong": "INTEGER",
+    "$toDouble": "REAL",
+    "$toDecimal": "REAL",
+}
+
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+_ARITHMETIC = {"$add": "+", "$subtract": "-", "$multiply": "*", "$divide": "/"}
+
+_ACCUMULATORS = {"$sum": "SUM", "$avg": "AVG", "$min": "MIN", "$max": "MAX"}
+
+def _identifier(name):
+    """Validate a field/table name before it is interpolated into SQL"""
+    if not isinstance(name, str) or not _IDENTIFIER.match(name):
+        raise ValueError(f"Unsupported field name in aggregation pipeline: {name!r}")
+    return name
+
+def _join_sql(parts, separator):
+    """Join (sql, params) pairs into a single (sql, params) pair"""
+    return separator.join(sql for sql, _ in parts), [p for _, params in parts for p in params]
+
+def _field_condition(column, column_params, value):
+    """Compile the query value for one field to a (sql, params) condition"""
+    if isinstance(value, re.Pattern):
+        value = {"$regex": value}
+    if not (isinstance(value, dict) and value and all(k.startswith("$") for k in value)):
+        if isinstance(value, (dict, list, tuple)):
+            raise ValueError(f"Unsupported query value: {value!r}")
+        return _comparison(column, column_params, "$eq", value)
+    
+    parts = []
+    for op, operand in value.items():
+        if op == "$options":
+            if "$regex" not in value:
+                raise ValueError("$options needs a $regex")
+            continue
+        if op == "$regex":
+            parts.append(_regex_condition(column, column_params, operand, value.get("$options", "")))
+        elif op == "$not":
+            sql, params = _field_condition(column, column_params, operand)
+            # Mongo's $not also matches documents without the field
+            parts.append((f"({column} IS NULL OR NOT ({sql}))", column_params + params))
+        elif op in ("$in", "$nin"):
+            parts.append(_membership(column, column_params, op, operand))
+        elif op == "$exists":
+            # Every row has every column; a missing field is a NULL
+            parts.append((f"{column} IS {'NOT ' if operand else ''}NULL", column_params))
+        elif op in _COMPARISONS:
+            parts.append(_comparison(column, column_params, op, operand))
+        else:
+            raise ValueError(f"Unsupported query operator: {op}")
+    return _join_sql(parts, " AND ")
+
+def _comparison(column, column_params, op, value):
+    if isinstance(value, (dict, list, tuple)):
+        raise ValueError(f"Unsupported {op} value: {value!r}")
+    if op == "$eq":
+        if value is None:
+            return f"{column} IS NULL", column_params
+        return f"{column} = ?", column_params + [value]
+    if op == "$ne":
+        # IS NOT keeps NULLs, as Mongo's $ne matches missing fields
+        return f"{column} IS NOT ?", column_params + [value]
+    return f"{column} {_COMPARISONS[op]} ?", column_params + [value]
+
+def _membership(column, column_params, op, values):
+    if not isinstance(values, (list, tuple, set)):
+        raise ValueError(f"{op} needs a list of values")
+    values = list(values)
+    has_null = None in values
+    values = [v for v in values if v is not None]
+    if any(isinstance(v, (dict, list, tuple, re.Pattern)) for v in values):
+        raise ValueError(f"Unsupported {op} value: {values!r}")
+    
+    if values:
+        sql = f"{column} IN ({', '.join('?' * len(values))})"
+        params = column_params + values
+    else:
+        sql, params = "0", []
+    
+    if op == "$in":
+        if has_null:
+            return f"({sql} OR {column} IS NULL)", params + column_params
+        return sql, params
+    # $nin matches missing fields unless null itself is excluded
+    null_test = "IS NOT NULL AND" if has_null else "IS NULL OR"
+    return f"({column} {null_test} NOT {sql})", column_params + params
+
+# Characters that end the literal part of a regex
+_REGEX_SPECIAL = set(".^$*+?{}[]()|\\")
+
+def _regex_literal(pattern):
+    """Split a regex into its leading literal text and the rest of the pattern"""
+    literal = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                literal.append(pattern[i + 1])
+                i += 2
+                continue
+            break
+        if char in _REGEX_SPECIAL:
+            break
+        literal.append(char)
+        i += 1
+    rest = pattern[i:]
+    if literal and rest[:1] in ("*", "+", "?", "{"):
+        # The quantifier makes the last literal character optional/repeated
+        literal.pop()
+    return "".join(literal), rest
+
+def _regex_condition(column, column_params, pattern, options=""):
+    """Compile $regex to the cheapest equivalent SQL
+    
+    "^abc" becomes an index-friendly range scan (rechecked with REGEXP under
+    "i"), "^abc$" an equality and a plain "abc" a substring test; the "i"
+    option uses COLLATE NOCASE/LIKE for ASCII text. Anything else runs
+    through the REGEXP function.
+    """
+    if isinstance(pattern, re.Pattern):
+        if pattern.flags & re.IGNORECASE and "i" not in options:
+            options += "i"
+        pattern = pattern.pattern
+    if not isinstance(pattern, str):
+        raise ValueError(f"$regex needs a string pattern: {pattern!r}")
+    unknown = set(options) - set("imsx")
+    if unknown:
+        raise ValueError(f"Unsupported $options: {''.join(sorted(unknown))}")
+    
+    nocase = "i" in options
+    anchored = pattern.startswith("^")
+    literal, rest = _regex_literal(pattern[1:] if anchored else pattern)
+    simple = "|" not in pattern and not set(options) & set("mx") and (literal.isascii() or not nocase)
+    
+    if simple and anchored and rest == "$":
+        if nocase:
+            return f"{column} = ? COLLATE NOCASE", column_params + [literal]
+        return f"{column} = ?", column_params + [literal]
+    if simple and not anchored and not rest and literal:
+        if nocase:
+            escaped = literal.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return f"{column} LIKE ? ESCAPE '\\'", column_params + [f"%{escaped}%"]
+        return f"instr({column}, ?) > 0", column_params + [literal]
+    
+    flags = "".join(sorted(set(options)))
+    regexp = (f"{column} REGEXP ?", column_params + [f"(?{flags}){pattern}" if flags else pattern])
+    if not (simple and anchored and literal) or ord(literal[-1]) >= 0x10FFFF:
+        return regexp
+    
+    # Strings starting with the prefix sort in [prefix, prefix with its last character bumped)
+    low = literal.lower() if nocase else literal
+    high = low[:-1] + chr(ord(low[-1]) + 1)
+    collate = " COLLATE NOCASE" if nocase else ""
+    parts = [(f"{column} >= ?{collate} AND {column} < ?{collate}", column_params + [low] + column_params + [high])]
+    # Under NOCASE the bumped bound can itself fold ("@" -> "A" -> "a"),
+    # letting in "[", "_", "`"...; the range only narrows the scan then
+    if rest or nocase:
+        parts.append(regexp)
+    return _join_sql(parts, " AND ")
+
+class _PipelineCompiler:
+    """Compile a MongoDB-style aggregation pipeline into one SQL statement
+    
+    Supports $match, $lookup (localField/foreignField or let/pipeline with
+    $expr equality), $unwind, $addFields/$set, $project, $group, $sort,
+    $skip and $limit. Each $lookup must be flattened by $unwind and becomes a
+    JOIN whose fields are reachable as "<as>.<field>"; stages that cannot extend the current SELECT (anything
+    after $group, or after $skip/$limit) wrap it in a subquery.
+    """
+    
+    def __init__(self, collection):
+        self.collection = collection
+        self.subqueries = 0
+        self.json_fields = set()
+        self._start_level(f"{collection.table_name} AS t0", [], "t0", collection.columns())
+    
+    def _start_level(self, source, source_params, alias, columns):
+        self.source = source
+        self.source_params = source_params
+        self.fields = {column: (f"{alias}.{column}", []) for column in columns}
+        id_column = "_id" if "_id" in columns else "id"
+        self.id_expr = (f"{alias}.{id_column}", []) if id_column in columns else ("NULL", [])
+        self.lookups = {}
+        self.joins = []
+        self.where = []
+        self.group_by = None
+        self.order = []
+        self.skip = None
+        self.limit = None
+    
+    def compile(self, pipeline):
+        """Return (sql, params, json_fields) for the pipeline"""
+        for stage in pipeline:
+            if len(stage) != 1:
+                raise ValueError(f"Aggregation stage must have exactly one operator: {stage}")
+            (op, spec), = stage.items()
+            handler = self.STAGES.get(op)
+            if handler is None:
+                raise ValueError(f"Unsupported aggregation stage: {op}")
+            if op not in ("$lookup", "$unwind"):
+                self._check_unwound()
+            
+            if self.group_by is not None:
+                self._wrap()
+            elif op == "$limit":
+                if self.limit is not None:
+                    self._wrap()
+            elif self.skip is not None or self.limit is not None:
+                self._wrap()
+            handler(self, spec)
+        
+        self._check_unwound()
+        sql, params = self._select()
+        return sql, params, self.json_fields
+    
+    def _check_unwound(self):
+        # A bare JOIN repeats the document per match instead of building the
+        # "as" array, so every $lookup must be flattened by $unwind
+        for name, scope in self.lookups.items():
+            if not scope["unwound"]:
+                raise ValueError(f"$lookup into {name!r} must be followed by $unwind on ${name}")
+    
+    def _wrap(self):
+        """Turn everything compiled so far into a subquery"""
+        sql, params = self._select()
+        self.subqueries += 1
+        alias = f"s{self.subqueries}"
+        self._start_level(f"({sql}) AS {alias}", params, alias, list(self.fields))
+    
+    def _select(self):
+        select, params = _join_sql(
+            [(f"{sql} AS {name}", field_params) for name, (sql, field_params) in self.fields.items()],
+            ", ",
+        )
+        sql = f"SELECT {select} FROM {self.source}"
+        params += self.source_params
+        
+        for join in self.joins:
+            kind = "LEFT JOIN" if join["preserve"] else "JOIN"
+            on, on_params = _join_sql(join["on"], " AND ")
+            sql += f" {kind} {join['table']} AS {join['alias']} ON {on or '1'}"
+            params += on_params
+        
+        if self.where:
+            where, where_params = _join_sql(self.where, " AND ")
+            sql += f" WHERE {where}"
+            params += where_params
+        
+        if self.group_by is not None:
+            sql += f" GROUP BY {self.group_by[0]}"
+            params += self.group_by[1]
+        
+        if self.order:
+            order, order_params = _join_sql(self.order, ", ")
+            sql += f" ORDER BY {order}"
+            params += order_params
+        
+        if self.skip is not None or self.limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [self.limit if self.limit is not None else -1, self.skip or 0]
+        
+        return sql, params
+    
+    # ---- Expressions ----
+    
+    def _expr(self, value, scope=None, variables=None, strip=False):
+        """Compile an aggregation expression to (sql, params)"""
+        if isinstance(value, str) and value.startswith("$$"):
+            name = value[2:]
+            if not variables or name not in variables:
+                raise ValueError(f"Unknown pipeline variable: {value}")
+            # let variables are evaluated against the outer (local) document
+            return self._expr(variables[name], strip=strip)
+        if isinstance(value, str) and value.startswith("$"):
+            return self._field(value[1:], scope, variables, strip)
+        if isinstance(value, dict) and len(value) == 1 and next(iter(value)).startswith("$"):
+            (op, args), = value.items()
+            return self._operator(op, args, scope, variables, strip)
+        if value is None:
+            return "NULL", []
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Unsupported literal in aggregation pipeline: {value!r}")
+        return "?", [value]
+    
+    def _field(self, path, scope=None, variables=None, strip=False):
+        """Resolve a field path to its SQL expression (NULL when missing)"""
+        if scope is not None:
+            if path in scope["computed"]:
+                return self._expr(scope["computed"][path], scope, variables, strip)
+            column = "id" if path == "_id" else path
+            if column in scope["columns"]:
+                return f"{scope['alias']}.{column}", []
+            return "NULL", []
+        
+        if path == "_id":
+            return self.id_expr
+        if path in self.fields:
+            return self.fields[path]
+        head, _, rest = path.partition(".")
+        if rest and head in self.lookups:
+            return self._field(rest, self.lookups[head], None, strip)
+        return "NULL", []
+    
+    def _operator(self, op, args, scope, variables, strip):
+        def compile_args(values):
+            if not isinstance(values, list):
+                values = [values]
+            return [self._expr(v, scope, variables, strip) for v in values]
+        
+        if op in _CASTS:
+            inner = self._expr(args, scope, variables, strip)
+            if strip and op in _ID_CONVERSIONS:
+                return inner
+            return f"CAST({inner[0]} AS {_CASTS[op]})", inner[1]
+        if op in ("$substr", "$substrCP", "$substrBytes"):
+            (string, string_params), (start, start_params), (length, length_params) = compile_args(args)
+            return f"SUBSTR({string}, {start} + 1, {length})", string_params + start_params + length_params
+        if op == "$ifNull":
+            sql, params = _join_sql(compile_args(args), ", ")
+            return f"COALESCE({sql})", params
+        if op in _COMPARISONS:
+            sql, params = _join_sql(compile_args(args), f" {_COMPARISONS[op]} ")
+            return f"({sql})", params
+        if op in _ARITHMETIC:
+            sql, params = _join_sql(compile_args(args), f" {_ARITHMETIC[op]} ")
+            return f"({sql})", params
+        if op == "$concat":
+            sql, params = _join_sql(compile_args(args), " || ")
+            return f"({sql})", params
+        if op in ("$and", "$or"):
+            sql, params = _join_sql(compile_args(args), f" {op[1:].upper()} ")
+            return f"({sql})", params
+        if op == "$not":
+            sql, params = compile_args(args)[0]
+            return f"(NOT {sql})", params
+        if op == "$cond":
+            if isinstance(args, dict):
+                args = [args["if"], args["then"], args["else"]]
+            (cond, cond_params), (then, then_params), (other, other_params) = compile_args(args)
+            return f"(CASE WHEN {cond} THEN {then} ELSE {other} END)", cond_params + then_params + other_params
+        raise ValueError(f"Unsupported aggregation operator: {op}")
+    
+    def _accumulator(self, name, spec):
+        if not isinstance(spec, dict) or len(spec) != 1:
+            raise ValueError(f"Invalid $group accumulator for {name}: {spec!r}")
+        (op, arg), = spec.items()
+        if op == "$count" or (op == "$sum" and arg == 1 and not isinstance(arg, bool)):
+            return "COUNT(*)", []
+        sql, params = self._expr(arg)
+        if op == "$sum":
+            # Mongo sums an empty or non-numeric group to 0, SQL SUM to NULL
+            return f"COALESCE(SUM({sql}), 0)", params
+        if op in _ACCUMULATORS:
+            return f"{_ACCUMULATORS[op]}({sql})", params
+        if op in ("$push", "$addToSet"):
+            self.json_fields.add(name)
+            distinct = "DISTINCT " if op == "$addToSet" else ""
+            return f"json_group_array({distinct}{sql})", params
+        raise ValueError(f"Unsupported $group accumulator: {op}")
+    
+    # ---- Stages ----
+    
+    def _match(self, spec):
+        query = dict(spec)
+        expr = query.pop("$expr", None)
+        if expr is not None:
+            self.where.append(self._expr(expr))
+        conditions, params = self.collection._build_conditions(query, resolve=self._field)
+        if conditions:
+            self.where.append((" AND ".join(conditions), params))
+    
+    def _lookup(self, spec):
+        table = _identifier(spec["from"])
+        alias = f"j{len(self.joins) + 1}"
+        scope = {
+            "table": table,
+            "alias": alias,
+            "columns": SQLiteDB(table).columns(),
+            "computed": {},
+            "on": [],
+            "preserve": True,
+            "unwound": False,
+        }
+        
+        if "localField" in spec:
+            local_sql, local_params = self._field(spec["localField"])
+            foreign = "id" if spec["foreignField"] == "_id" else _identifier(spec["foreignField"])
+            scope["on"].append((f"{alias}.{foreign} = {local_sql}", local_params))
+        
+        variables = spec.get("let", {})
+        for stage in spec.get("pipeline", []):
+            (op, body), = stage.items()
+            if op in ("$addFields", "$set"):
+                scope["computed"].update(body)
+            elif op == "$match":
+                query = dict(body)
+                expr = query.pop("$expr", None)
+                if expr is not None:
+                    scope["on"].append(self._expr(expr, scope, variables, strip=True))
+                conditions, params = self.collection._build_conditions(
+                    query, resolve=lambda key: self._field(key, scope)
+                )
+                if conditions:
+                    scope["on"].append((" AND ".join(conditions), params))
+            else:
+                raise ValueError(f"Unsupported $lookup pipeline stage: {op}")
+        
+        self.joins.append(scope)
+        self.lookups[_identifier(spec["as"])] = scope
+    
+    def _unwind(self, spec):
+        if isinstance(spec, str):
+            spec = {"path": spec}
+        name = spec["path"].lstrip("$")
+        if name not in self.lookups:
+            raise ValueError(f"$unwind is only supported on $lookup results: {spec['path']}")
+        self.lookups[name]["preserve"] = bool(spec.get("preserveNullAndEmptyArrays", False))
+        self.lookups[name]["unwound"] = True
+    
+    def _add_fields(self, spec):
+        # All expressions see the document as it was before this stage
+        compiled = {_identifier(name): self._expr(value) for name, value in spec.items()}
+        self.fields.update(compiled)
+    
+    def _project(self, spec):
+        # Narrows the SELECT list, so only the projected columns are read
+        id_name = "_id" if "_id" in self.fields else "id"
+        included = {}
+        excluded = set()
+        for name, value in spec.items():
+            if isinstance(value, (bool, int)) and not value:
+                excluded.add(id_name if name == "_id" else name)
+            elif isinstance(value, (bool, int)):
+                name = id_name if name == "_id" else name
+                if name not in self.fields:
+                    raise ValueError(f"Unknown field in $project: {name}")
+                included[name] = self.fields[name]
+            else:
+                included[_identifier(name)] = self._expr(value)
+                if isinstance(value, str) and value[1:] in self.json_fields:
+                    self.json_fields.add(name)
+        
+        if included and excluded - {id_name}:
+            raise ValueError("$project cannot mix inclusion and exclusion (except _id)")
+        if included:
+            # Like Mongo, the id is kept unless excluded explicitly
+            if id_name in self.fields and id_name not in excluded and id_name not in included:
+                included = {id_name: self.fields[id_name], **included}
+            self.fields = included
+        else:
+            self.fields = {name: sql for name, sql in self.fields.items() if name not in excluded}
+    
+    def _group(self, spec):
+        group_id = spec.get("_id")
+        if group_id is None:
+            # Constant key: one group, or no rows at all for empty input
+            key = ("NULL", [])
+        elif isinstance(group_id, dict) and not any(k.startswith("$") for k in group_id):
+            parts = []
+            for name, value in group_id.items():
+                sql, params = self._expr(value)
+                parts.append((f"'{_identifier(name)}', {sql}", params))
+            sql, params = _join_sql(parts, ", ")
+            key = (f"json_object({sql})", params)
+            self.json_fields.add("_id")
+        else:
+            key = self._expr(group_id)
+        
+        outputs = {"_id": key}
+        for name, accumulator in spec.items():
+            if name != "_id":
+                outputs[_identifier(name)] = self._accumulator(name, accumulator)
+        
+        self.fields = outputs
+        self.group_by = key
+        self.order = []
+    
+    def _sort(self, spec):
+        order = []
+        for field, direction in spec.items():
+            sql, params = self._field(field)
+            order.append((f"{sql} {'DESC' if direction == -1 else 'ASC'}", params))
+        self.order = order
+    
+    def _skip(self, spec):
+        self.skip = int(spec)
+    
+    def _limit(self, spec):
+        self.limit = int(spec)
+    
+    STAGES = {
+        "$match": _match,
+        "$lookup": _lookup,
+        "$unwind": _unwind,
+        "$addFields": _add_fields,
+        "$set": _add_fields,
+        "$project": _project,
+        "$group": _group,
+        "$sort": _sort,
+        "$skip": _skip,
+        "$limit": _limit,
+    }
 
 class Database:
     """Database wrapper"""
@@ -0,0 +1,92 @@
+"""
+In-memory cache for rendered template fragments
+
+Wrap an expensive, rarely changing section of a template in a call block:
+
+    {% call cache_fragment("dept_workers", department, depends=("workers", "complaints")) %}
+      {% set workers = load_workers() %}
+      ...
+    {% endcall %}
+
+The cache key is the fragment name, any extra key parts, the request's
+language and role, and the current version of every table in `depends`.
+Versions live in the data_versions table and are bumped in the same
+transaction as each complaint/worker write, so every gunicorn worker sees
+changes immediately. Routes pass loader callables rather than data so the
+queries behind a cached fragment are skipped too.
+"""
+import threading
+from collections import OrderedDict
+
+from flask import g, session
+from markupsafe import Markup
+
+from config import Config
+from database_sqlite import VERSIONED_TABLES, get_data_versions
+
+
+class FragmentCache:
+    """Bounded LRU of rendered markup"""
+
+    def __init__(self, max_entries=256, enabled=True):
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            markup = self._entries.get(key)
+            if markup is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return markup
+
+    def put(self, key, markup):
+        with self._lock:
+            self._entries[key] = markup
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+fragment_cache = FragmentCache(max_entries=Config.FRAGMENT_CACHE_SIZE, enabled=Config.FRAGMENT_CACHE_ENABLED)
+
+
+def _data_versions():
+    # One query per request, however many fragments the page has
+    if "data_versions" not in g:
+        g.data_versions = get_data_versions()
+    return g.data_versions
+
+
+def cache_fragment(name, *key, depends=VERSIONED_TABLES, caller=None):
+    """Template helper used with {% call %}; returns the cached or fresh body"""
+    if not fragment_cache.enabled:
+        return caller()
+
+    versions = _data_versions()
+    cache_key = (
+        name,
+        key,
+        session.get("lang", "en"),
+        session.get("role"),
+        tuple(versions.get(table, 0) for table in depends),
+    )
+    markup = fragment_cache.get(cache_key)
+    if markup is None:
+        markup = Markup(caller())
+        fragment_cache.put(cache_key, markup)
+    return markup
+
+
+def init_app(app):
+    app.jinja_env.globals["cache_fragment"] = cache_fragment
@@ -0,0 +1,84 @@
+"""
+Compiled translation catalog
+
+translations.py is flattened once into one lookup table per locale with the
+fallback chain already merged in (a key missing in Kannada resolves to the
+English text at build time, not on every lookup). The result is marshalled
+to I18N_CACHE_FILE and reused while translations.py is unchanged, so later
+starts skip importing the big dict literal.
+
+Each request binds the table for its language once (see app.py); a
+translation is then a single dict lookup that returns the key itself when
+no locale has it.
+"""
+import marshal
+import os
+
+from config import Config
+
+DEFAULT_LOCALE = "en"
+# locale -> locales consulted, in order, for keys it does not define
+FALLBACKS = {}
+
+SOURCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translations.py")
+FORMAT_VERSION = 1
+
+
+class Translator(dict):
+    """One locale's table; calling it translates a key"""
+
+    def __missing__(self, key):
+        return key
+
+    __call__ = dict.__getitem__
+
+
+def _source_stamp():
+    stat = os.stat(SOURCE_FILE)
+    return [FORMAT_VERSION, stat.st_mtime_ns, stat.st_size]
+
+
+def build_catalog(translations, default=DEFAULT_LOCALE):
+    """{locale: {key: text}} with every fallback chain merged in"""
+    catalog = {}
+    for locale, table in translations.items():
+        merged = {}
+        for fallback in reversed([default] + FALLBACKS.get(locale, [])):
+            merged.update(translations.get(fallback, {}))
+        merged.update(table)
+        catalog[locale] = merged
+    return catalog
+
+
+def load_catalog(cache_file=Config.I18N_CACHE_FILE):
+    """Read the marshalled catalog, rebuilding it when translations.py changed"""
+    stamp = _source_stamp()
+    if cache_file:
+        try:
+            with open(cache_file, "rb") as f:
+                cached_stamp, catalog = marshal.load(f)
+            if cached_stamp == stamp:
+                return catalog
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    from translations import translations
+    catalog = build_catalog(translations)
+
+    if cache_file:
+        tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                marshal.dump((stamp, catalog), f)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            print(f"⚠️ Could not write translation cache {cache_file}: {e}")
+    return catalog
+
+
+catalog = {locale: Translator(table) for locale, table in load_catalog().items()}
+
+
+def translator(locale):
+    """Bound translator for a locale (the default locale if unknown)"""
+    return catalog.get(locale) or catalog[DEFAULT_LOCALE]
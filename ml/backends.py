@@ -0,0 +1,94 @@
+"""Inference backends for the DistilBERT department classifier.
+
+Every backend takes tokenizer output and returns predicted class ids, so the
+router can switch between them with the ML_BACKEND environment variable:
+
+    torch       fp32 PyTorch eager mode (default)
+    torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+    onnx        ONNX Runtime on CPU (export first with `python -m ml.export_onnx`)
+"""
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEPT_MODEL_DIR = os.path.join(BASE_DIR, "model")
+ONNX_MODEL_PATH = os.path.join(DEPT_MODEL_DIR, "model.onnx")
+
+# Python packages each backend needs (the tokenizer always needs transformers)
+BACKEND_REQUIREMENTS = {
+    "torch": ("torch", "joblib", "transformers"),
+    "torch-int8": ("torch", "joblib", "transformers"),
+    "onnx": ("onnxruntime", "joblib", "transformers"),
+}
+
+# Weights file each backend loads from the model directory
+BACKEND_MODEL_FILES = {
+    "torch": "model.safetensors",
+    "torch-int8": "model.safetensors",
+    "onnx": "model.onnx",
+}
+
+
+class TorchBackend:
+    """DistilBERT in PyTorch, optionally dynamically quantized to int8."""
+
+    tensor_type = "pt"
+
+    def __init__(self, model_dir=DEPT_MODEL_DIR, quantize=False):
+        import torch
+        from transformers import DistilBertForSequenceClassification
+
+        model = DistilBertForSequenceClassification.from_pretrained(model_dir, use_safetensors=True)
+        model.eval()
+        if quantize:
+            # Weights of every nn.Linear are stored as int8; activations are
+            # quantized on the fly. Roughly 4x smaller and faster on CPU.
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.torch = torch
+        self.model = model
+        self.name = "torch-int8" if quantize else "torch"
+
+    def predict_ids(self, inputs) -> list:
+        with self.torch.no_grad():
+            logits = self.model(**inputs).logits
+        return self.torch.argmax(logits, dim=1).tolist()
+
+
+class OnnxBackend:
+    """DistilBERT exported to ONNX and run with ONNX Runtime on CPU."""
+
+    tensor_type = "np"
+    name = "onnx"
+
+    def __init__(self, model_path=ONNX_MODEL_PATH, num_threads=None):
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found - run `python -m ml.export_onnx` to create it"
+            )
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def predict_ids(self, inputs) -> list:
+        feed = {name: value.astype("int64") for name, value in inputs.items() if name in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        return logits.argmax(axis=1).tolist()
+
+
+def create_backend(name: str, model_dir: str = DEPT_MODEL_DIR, onnx_path: str = None):
+    """Instantiate the backend called name (see BACKEND_REQUIREMENTS).
+
+    onnx_path overrides the ONNX file, which is otherwise model.onnx in model_dir.
+    """
+    if name == "torch":
+        return TorchBackend(model_dir)
+    if name == "torch-int8":
+        return TorchBackend(model_dir, quantize=True)
+    if name == "onnx":
+        threads = int(os.environ.get("ML_NUM_THREADS", 0)) or None
+        return OnnxBackend(onnx_path or os.path.join(model_dir, BACKEND_MODEL_FILES["onnx"]), num_threads=threads)
+    raise ValueError(f"Unknown ML backend: {name!r} (expected one of {sorted(BACKEND_REQUIREMENTS)})")
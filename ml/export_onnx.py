@@ -0,0 +1,159 @@
+"""Export the department classifier to ONNX and check backend accuracy parity.
+
+Usage (from the project root):
+
+    python -m ml.export_onnx                  # export ml/model/model.onnx, then compare backends
+    python -m ml.export_onnx --check-only     # only compare the requested backends
+    python -m ml.export_onnx --from-db 500    # also compare on 500 stored complaints
+
+Every backend's predictions are decoded with label_encoder.joblib and
+compared against the fp32 PyTorch model, which is the reference.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from ml.backends import DEPT_MODEL_DIR, ONNX_MODEL_PATH, create_backend
+
+# Representative complaints, a few per department
+SAMPLE_TEXTS = [
+    "No water supply - There has been no water in our street for three days",
+    "Pipe leakage - Drinking water pipe is leaking near the bus stop",
+    "Contaminated water - Tap water is muddy and smells bad",
+    "Pothole on main road - Big pothole causing accidents near the school",
+    "Road damaged - The highway stretch is broken after the rains",
+    "Footpath broken - Pedestrians are forced to walk on the road",
+    "Garbage not collected - Waste has not been picked up for a week",
+    "Overflowing dustbin - The dustbin near the market is overflowing",
+    "Dead animal on road - Carcass lying on the street and stinking",
+    "Street light not working - The street lights on 5th cross are off",
+    "Power cut - Frequent power outages in our area every evening",
+    "Electric pole damaged - Transformer sparking near the park",
+    "Stray dogs - Stray dogs are attacking children in the colony",
+    "Noise pollution - Loudspeakers playing late at night",
+    "Illegal construction - Building being constructed without permission",
+    "Mosquito menace - Stagnant water breeding mosquitoes in the lane",
+]
+
+
+def load_texts(args):
+    texts = list(SAMPLE_TEXTS)
+    if args.samples:
+        with open(args.samples, encoding="utf-8") as f:
+            texts += [line.strip() for line in f if line.strip()]
+    if args.from_db:
+        conn = sqlite3.connect(args.database)
+        rows = conn.execute(
+            "SELECT title, description FROM complaints ORDER BY id DESC LIMIT ?", (args.from_db,)
+        ).fetchall()
+        conn.close()
+        texts += [f"{title} - {description}" for title, description in rows]
+    return texts
+
+
+def export_onnx(output_path, max_length):
+    import torch
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizer
+
+    tokenizer = DistilBertTokenizer.from_pretrained(DEPT_MODEL_DIR)
+    model = DistilBertForSequenceClassification.from_pretrained(DEPT_MODEL_DIR, use_safetensors=True)
+    model.eval()
+
+    dummy = tokenizer(
+        [SAMPLE_TEXTS[0]], return_tensors="pt", truncation=True, padding="max_length", max_length=max_length
+    )
+    torch.onnx.export(
+        model,
+        (dummy["input_ids"], dummy["attention_mask"]),
+        output_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"✅ Exported {output_path} ({size_mb:.1f} MB)")
+
+
+def predict_labels(backend, tokenizer, label_encoder, texts, max_length, batch_size=16):
+    labels = []
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[i:i + batch_size],
+            return_tensors=backend.tensor_type,
+            truncation=True,
+            padding=True,
+            max_length=max_length,
+        )
+        labels += list(label_encoder.inverse_transform(backend.predict_ids(inputs)))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return labels, elapsed_ms / max(1, len(texts))
+
+
+def check_parity(texts, backends, max_length, min_agreement, onnx_path=ONNX_MODEL_PATH):
+    import joblib
+    from transformers import DistilBertTokenizer
+
+    tokenizer = DistilBertTokenizer.from_pretrained(DEPT_MODEL_DIR)
+    label_encoder = joblib.load(os.path.join(DEPT_MODEL_DIR, "label_encoder.joblib"))
+
+    reference, ref_ms = predict_labels(create_backend("torch"), tokenizer, label_encoder, texts, max_length)
+    print(f"{'backend':<12} {'agreement':>10} {'ms/text':>9}")
+    print(f"{'torch':<12} {'100.0%':>10} {ref_ms:>9.2f}")
+
+    ok = True
+    for name in backends:
+        try:
+            backend = create_backend(name, onnx_path=onnx_path)
+        except Exception as e:
+            # A requested backend that cannot run has not been shown to agree
+            print(f"{name:<12} ❌ could not be loaded: {e}")
+            ok = False
+            continue
+        labels, ms = predict_labels(backend, tokenizer, label_encoder, texts, max_length)
+        matches = sum(a == b for a, b in zip(reference, labels))
+        agreement = matches / len(texts)
+        print(f"{name:<12} {agreement:>9.1%} {ms:>9.2f}")
+        for text, expected, got in zip(texts, reference, labels):
+            if expected != got:
+                print(f"    ✗ {text[:60]!r}: torch={expected} {name}={got}")
+        if agreement < min_agreement:
+            ok = False
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=ONNX_MODEL_PATH, help="ONNX file to write and check")
+    parser.add_argument("--check-only", action="store_true", help="skip the export step")
+    parser.add_argument("--backends", default="torch-int8,onnx", help="comma-separated backends to compare")
+    parser.add_argument("--samples", help="extra texts to compare, one per line")
+    parser.add_argument("--from-db", type=int, default=0, metavar="N", help="also compare N stored complaints")
+    parser.add_argument("--database", default="icgs_complaints.db")
+    parser.add_argument("--max-length", type=int, default=int(os.environ.get("DEPT_MAX_LENGTH", 128)))
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args(argv)
+
+    if not args.check_only:
+        export_onnx(args.output, args.max_length)
+
+    texts = load_texts(args)
+    ok = check_parity(
+        texts, [b for b in args.backends.split(",") if b], args.max_length, args.min_agreement, args.output
+    )
+    if not ok:
+        print(f"❌ A backend failed to load or agreed below {args.min_agreement:.0%} - keep ML_BACKEND=torch")
+        return 1
+    print("✅ Backends agree with the fp32 model")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
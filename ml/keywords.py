@@ -0,0 +1,113 @@
+"""Keyword-based department classifier used when the ML model is unavailable.
+
+The per-department keyword tables below are compiled once into a single
+regular expression (longest keywords first, so "street light" wins over
+"street"), and a complaint is scored in one pass over its text. Each match
+adds the keyword's weight to its department; the highest total wins and
+ties go to the department listed first. To extend the fallback, add
+keywords (in any language) with a weight to DEPARTMENT_KEYWORDS, then run
+`python -m ml.keywords` to check the sample complaints still route correctly.
+"""
+import re
+
+DEFAULT_DEPARTMENT = "General Department"
+
+# department -> {keyword: weight}, matched case-insensitively. English
+# keywords match whole words (plus a plural/-ed/-ing/-age ending), other
+# scripts anywhere in the text, so avoid terms that are also common word
+# endings. English, Kannada, Hindi, Telugu and Tamil terms.
+DEPARTMENT_KEYWORDS = {
+    "Water Crisis": {
+        "water": 3, "pipe": 2, "leak": 2, "tap": 2, "supply": 1, "borewell": 3, "tanker": 2,
+        "ನೀರು": 3, "ನೀರಿನ": 3, "ಪೈಪ್": 2, "ನಲ್ಲಿ ನೀರು": 3,
+        "पानी": 3, "जल": 2, "नल": 2, "पाइप": 2,
+        "నీరు": 3, "నీటి": 3, "నీళ్ళు": 3, "పైపు": 2, "కుళాయి": 2,
+        "தண்ணீர்": 3, "நீர்": 2, "குழாய்": 2,
+    },
+    "Road Maintenance(Engg)": {
+        "road": 3, "pothole": 3, "street": 1, "highway": 2, "footpath": 2, "bridge": 2,
+        "ರಸ್ತೆ": 3, "ಗುಂಡಿ": 2,
+        "सड़क": 3, "गड्ढा": 3, "गड्ढे": 3,
+        "రోడ్డు": 3, "రహదారి": 3, "గుంత": 2,
+        "சாலை": 3, "ரோடு": 3, "பள்ளம்": 2,
+    },
+    "Solid Waste (Garbage) Related": {
+        "garbage": 3, "waste": 2, "trash": 3, "dustbin": 3, "litter": 2, "dump": 2,
+        "ಕಸ": 3, "ತ್ಯಾಜ್ಯ": 3,
+        "कचरा": 3, "कूड़ा": 3, "गंदगी": 2,
+        "చెత్త": 3, "వ్యర్థ": 3,
+        "குப்பை": 3, "கழிவு": 2,
+    },
+    "Electrical": {
+        "light": 2, "electric": 3, "power": 2, "street light": 4, "streetlight": 4,
+        "transformer": 3, "current": 2, "wire": 1,
+        "ವಿದ್ಯುತ್": 3, "ಬೀದಿ ದೀಪ": 4, "ದೀಪ": 2,
+        "बिजली": 3, "स्ट्रीट लाइट": 4, "लाइट": 2,
+        "విద్యుత్": 3, "కరెంట్": 3, "వీధి దీపం": 4, "దీపం": 2,
+        "மின்சாரம்": 3, "மின்": 2, "தெரு விளக்கு": 4, "விளக்கு": 2,
+    },
+}
+
+
+class KeywordClassifier:
+    """Weighted keyword matcher compiled into a single regex."""
+
+    def __init__(self, table, default=DEFAULT_DEPARTMENT):
+        self.default = default
+        self.departments = list(table)
+        self._weights = {}
+        for department, keywords in table.items():
+            for keyword, weight in keywords.items():
+                self._weights.setdefault(keyword.casefold(), []).append((department, weight))
+        words = sorted((k for k in self._weights if k.isascii()), key=len, reverse=True)
+        others = sorted((k for k in self._weights if not k.isascii()), key=len, reverse=True)
+        # "current" must not match "currently", nor "tap" "capital"
+        self._pattern = re.compile(
+            r"\b(" + "|".join(map(re.escape, words)) + r")(?:s|es|ed|ing|age)?\b"
+            + "|(" + "|".join(map(re.escape, others)) + ")"
+        )
+
+    def scores(self, text: str) -> dict:
+        totals = {}
+        for match in self._pattern.finditer(text.casefold()):
+            for department, weight in self._weights[match.group(1) or match.group(2)]:
+                totals[department] = totals.get(department, 0) + weight
+        return totals
+
+    def classify(self, title: str, description: str) -> str:
+        totals = self.scores(f"{title or ''} {description or ''}")
+        if not totals:
+            return self.default
+        # Highest score wins; ties go to the department listed first
+        return max(self.departments, key=lambda d: (totals.get(d, 0), -self.departments.index(d)))
+
+
+keyword_classifier = KeywordClassifier(DEPARTMENT_KEYWORDS)
+
+
+# (title, description, expected department), including mixed-language text
+# and words that merely contain a keyword
+SELF_CHECKS = [
+    ("No water supply", "Pipes leaking near the bus stop", "Water Crisis"),
+    ("ನಲ್ಲಿ ನೀರು ಬರುತ್ತಿಲ್ಲ", "no water since Monday", "Water Crisis"),
+    ("ನಮ್ಮ ಊರಿನಲ್ಲಿ ಗುಂಡಿ", "", "Road Maintenance(Engg)"),
+    ("ಬೆಂಗಳೂರಿನಲ್ಲಿ ಬೀದಿ ದೀಪ ಇಲ್ಲ", "", "Electrical"),
+    ("Potholes on the road", "सड़क पर गड्ढे", "Road Maintenance(Engg)"),
+    ("Power currently down", "", "Electrical"),
+    ("Garbage near the capital park", "कचरा नहीं उठाया", "Solid Waste (Garbage) Related"),
+    ("Street lights not working", "வீதியில் தெரு விளக்கு", "Electrical"),
+    ("Currently nothing", "capital complaint", DEFAULT_DEPARTMENT),
+]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for title, description, expected in SELF_CHECKS:
+        got = keyword_classifier.classify(title, description)
+        if got != expected:
+            failures += 1
+            print(f"❌ {title!r} / {description!r}: expected {expected}, got {got} "
+                  f"{keyword_classifier.scores(f'{title} {description}')}")
+    if failures:
+        raise SystemExit(1)
+    print(f"✅ {len(SELF_CHECKS)} keyword checks passed")
@@ -0,0 +1,118 @@
+"""LRU cache of department predictions keyed by normalized complaint text.
+
+Citizens often file near-identical complaints ("No water supply!",
+"no water  supply"), so the normalized title+description is hashed and the
+model's answer reused. Entries are fixed-size SHA-1 keys, which keeps memory
+bounded by max_entries. When db_path is set, predictions are also stored in
+a small SQLite table so the cache survives restarts.
+"""
+import hashlib
+import os
+import sqlite3
+import string
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+_PUNCTUATION = str.maketrans({ch: " " for ch in string.punctuation + "।॥"})
+
+
+def normalize_text(title: str, description: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace."""
+    text = f"{title or ''} {description or ''}".casefold().translate(_PUNCTUATION)
+    return " ".join(text.split())
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with hit/miss counters and optional persistence."""
+
+    def __init__(self, max_entries=4096, db_path=None, namespace=""):
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        if db_path:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                        "key TEXT PRIMARY KEY, department TEXT NOT NULL, created_at TEXT)"
+                    )
+
+    def _connection(self):
+        """The shared connection for this process (call with self._lock held)."""
+        if self._conn_pid != os.getpid():
+            # Never reuse a connection inherited across a fork
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def key(self, title: str, description: str) -> str:
+        normalized = normalize_text(title, description)
+        return hashlib.sha1(f"{self.namespace}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            department = self._entries.get(key)
+            if department is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return department
+
+        if self.db_path:
+            try:
+                with self._lock:
+                    row = self._connection().execute(
+                        "SELECT department FROM prediction_cache WHERE key = ?", (key,)
+                    ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row:
+                self._remember(key, row[0])
+                with self._lock:
+                    self.hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, department: str):
+        self._remember(key, department)
+        if self.db_path:
+            try:
+                with self._lock, self._connection() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO prediction_cache (key, department, created_at) VALUES (?, ?, ?)",
+                        (key, department, datetime.now().isoformat()),
+                    )
+            except sqlite3.Error as e:
+                print(f"⚠️ Prediction cache write failed: {e}")
+
+    def _remember(self, key, department):
+        with self._lock:
+            self._entries[key] = department
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": bool(self.db_path),
+        }
@@ -1,72 +1,292 @@
+import importlib.util
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
 
-# Try to import ML dependencies, but make them optional
-try:
-    import torch
-    import joblib
-    from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
-    print("⚠️ ML libraries not installed - using fallback predictions")
+from ml.backends import BACKEND_MODEL_FILES, BACKEND_REQUIREMENTS, DEPT_MODEL_DIR, create_backend
+from ml.keywords import keyword_classifier
+from ml.prediction_cache import PredictionCache
+
+# Inference backend: torch (default), torch-int8 or onnx - see ml/backends.py
+ML_BACKEND = os.environ.get("ML_BACKEND", "torch")
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# ML dependencies are optional. Only check that they are installed here;
+# they are imported when the model is first loaded so that importing this
+# module (and booting gunicorn workers) stays fast.
+ML_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in BACKEND_REQUIREMENTS.get(ML_BACKEND, BACKEND_REQUIREMENTS["torch"])
+)
+if not ML_AVAILABLE:
+    print("⚠️ ML libraries not installed - using fallback predictions")
 
 # ==========================================
 # DEPARTMENT MODEL (DistilBERT)
 # ==========================================
-DEPT_MODEL_DIR = os.path.join(BASE_DIR, "model")
+
+# Inference settings: token cap per text and micro-batching window
+DEPT_MAX_LENGTH = int(os.environ.get("DEPT_MAX_LENGTH", 128))
+BATCH_MAX_SIZE = int(os.environ.get("ML_BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.environ.get("ML_BATCH_MAX_WAIT_MS", 10))
+PREDICT_TIMEOUT = float(os.environ.get("ML_PREDICT_TIMEOUT", 30))
 
 dept_tokenizer = None
-dept_model = None
+dept_model = None  # backend instance from ml.backends
 dept_label_encoder = None
 
-if ML_AVAILABLE:
-    try:
-        dept_tokenizer = DistilBertTokenizer.from_pretrained(DEPT_MODEL_DIR)
-        dept_model = DistilBertForSequenceClassification.from_pretrained(
-            DEPT_MODEL_DIR,
-            use_safetensors=True
-        )
-        dept_model.eval()
-        dept_label_encoder = joblib.load(os.path.join(DEPT_MODEL_DIR, "label_encoder.joblib"))
-        print("✅ ML Model loaded successfully!")
-    except Exception as e:
-        print(f"⚠️ ML Model loading error: {e}")
-        dept_tokenizer = None
-        dept_model = None
-        dept_label_encoder = None
+# Model lifecycle: "unloaded" -> "loading" -> "ready" | "failed"
+MODEL_LOAD_SECONDS = None
+_model_state = "unloaded"
+_model_state_pid = os.getpid()
+_model_lock = threading.Lock()
+
+
+def model_state() -> str:
+    """Current model lifecycle state for this process."""
+    global _model_state, _model_state_pid
+    if _model_state_pid != os.getpid():
+        # A loader thread started before a fork never finishes in the child
+        _model_state = "ready" if dept_model is not None else "unloaded"
+        _model_state_pid = os.getpid()
+    return _model_state
+
+
+def model_ready() -> bool:
+    """True once the tokenizer, model and label encoder are loaded."""
+    return model_state() == "ready"
+
+
+def load_model() -> bool:
+    """Load the department model once (thread-safe). Returns True when ready."""
+    global dept_tokenizer, dept_model, dept_label_encoder
+    global MODEL_LOAD_SECONDS, _model_state
+
+    if not ML_AVAILABLE:
+        return False
+    if model_state() in ("ready", "failed"):
+        return _model_state == "ready"
+
+    with _model_lock:
+        if _model_state in ("ready", "failed"):
+            return _model_state == "ready"
+        _model_state = "loading"
+        started = time.perf_counter()
+        try:
+            import joblib
+            from transformers import DistilBertTokenizer
+
+            tokenizer = DistilBertTokenizer.from_pretrained(DEPT_MODEL_DIR)
+            model = create_backend(ML_BACKEND, DEPT_MODEL_DIR)
+            label_encoder = joblib.load(os.path.join(DEPT_MODEL_DIR, "label_encoder.joblib"))
+        except Exception as e:
+            print(f"⚠️ ML Model loading error ({ML_BACKEND}): {e}")
+            _model_state = "failed"
+            return False
+
+        dept_tokenizer, dept_model, dept_label_encoder = tokenizer, model, label_encoder
+        MODEL_LOAD_SECONDS = round(time.perf_counter() - started, 3)
+        _model_state = "ready"
+        print(f"✅ ML Model ({ML_BACKEND}) loaded successfully in {MODEL_LOAD_SECONDS}s!")
+        return True
+
+
+def warm_up_async():
+    """Start loading the model on a background thread; returns the thread (or None)."""
+    if not ML_AVAILABLE or model_state() != "unloaded":
+        return None
+    thread = threading.Thread(target=load_model, name="dept-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _predict_batch(texts: list) -> list:
+    """Classify several texts with one forward pass, returning department names."""
+    inputs = dept_tokenizer(
+        texts,
+        return_tensors=dept_model.tensor_type,
+        truncation=True,
+        padding=True,
+        max_length=DEPT_MAX_LENGTH,
+    )
+    pred_ids = dept_model.predict_ids(inputs)
+    return list(dept_label_encoder.inverse_transform(pred_ids))
+
+
+class BatchPredictor:
+    """In-process micro-batching queue.
+
+    Requests arriving within max_wait_ms of each other (up to max_batch_size)
+    are classified together by a single background thread, so concurrent
+    complaint submissions share one forward pass instead of competing for CPU.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=8, max_wait_ms=10.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        # The thread does not survive a fork, so check liveness on every submit
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="dept-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text: str, timeout: float = None) -> str:
+        return self.submit(text).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                results = self.predict_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), department in zip(batch, results):
+                future.set_result(department)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "queued": self._queue.qsize(),
+        }
+
+
+dept_batcher = BatchPredictor(_predict_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+
+
+def _model_version() -> str:
+    """Identify the model files so cached predictions expire when they change."""
+    parts = [ML_BACKEND]
+    # The active backend's weights (e.g. model.onnx for ML_BACKEND=onnx)
+    model_file = BACKEND_MODEL_FILES.get(ML_BACKEND, "model.safetensors")
+    for name in (model_file, "label_encoder.joblib"):
+        try:
+            stat = os.stat(os.path.join(DEPT_MODEL_DIR, name))
+            parts.append(f"{name}:{stat.st_size}:{int(stat.st_mtime)}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    return "|".join(parts)
+
+
+# Set ML_CACHE_DB to a file path to keep predictions across restarts
+dept_cache = PredictionCache(
+    max_entries=int(os.environ.get("ML_CACHE_SIZE", 4096)),
+    db_path=os.environ.get("ML_CACHE_DB") or None,
+    namespace=_model_version(),
+)
+
+
+_fallback_warned = False
+
+
+def _warn_fallback():
+    global _fallback_warned
+    if not _fallback_warned:
+        _fallback_warned = True
+        print("⚠️ ML Model not available, using keyword fallback")
 
 
 def predict_department(title: str, description: str) -> str:
     """Return department string predicted from title+description."""
+    # Lazy load on first use; while a background warm-up is still running,
+    # answer from the keyword fallback instead of blocking the request
+    if ML_AVAILABLE and model_state() == "unloaded":
+        load_model()
+
     # Fallback if model not loaded or ML not available
-    if not ML_AVAILABLE or dept_model is None or dept_tokenizer is None or dept_label_encoder is None:
-        print("⚠️ ML Model not available, using fallback")
-        # Simple keyword-based fallback
-        text = f"{title} {description}".lower()
-        if any(word in text for word in ["water", "pipe", "leak", "tap", "supply"]):
-            return "Water Crisis"
-        elif any(word in text for word in ["road", "pothole", "street", "highway"]):
-            return "Road Maintenance(Engg)"
-        elif any(word in text for word in ["garbage", "waste", "trash", "dustbin"]):
-            return "Solid Waste (Garbage) Related"
-        elif any(word in text for word in ["light", "electric", "power", "street light"]):
-            return "Electrical"
-        else:
-            return "General Department"
+    if not model_ready():
+        _warn_fallback()
+        return keyword_classifier.classify(title, description)
     
+    cache_key = dept_cache.key(title, description)
+    department = dept_cache.get(cache_key)
+    if department is not None:
+        return department
+
     try:
         text = f"{title} - {description}"
-        inputs = dept_tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        with torch.no_grad():
-            outputs = dept_model(**inputs)
-            pred_id = int(torch.argmax(outputs.logits, dim=1).item())
-        department = dept_label_encoder.inverse_transform([pred_id])[0]
-        return department
+        department = dept_batcher.predict(text, timeout=PREDICT_TIMEOUT)
     except Exception as e:
         print("Department prediction error:", e)
         return "General Department"
+    dept_cache.put(cache_key, department)
+    return department
+
+
+def predict_departments(items: list) -> list:
+    """Batch form of predict_department for a list of (title, description) pairs.
+
+    Unlike predict_department, model errors are raised so that callers
+    (background jobs, bulk reclassification) can retry them.
+    """
+    if ML_AVAILABLE and model_state() == "unloaded":
+        load_model()
+
+    if not model_ready():
+        _warn_fallback()
+        return [keyword_classifier.classify(title, description) for title, description in items]
+
+    keys = [dept_cache.key(title, description) for title, description in items]
+    results = [dept_cache.get(key) for key in keys]
+    # Queue every miss before waiting so they share the batcher's forward passes
+    futures = {
+        i: dept_batcher.submit(f"{title} - {description}")
+        for i, (title, description) in enumerate(items)
+        if results[i] is None
+    }
+    for i, future in futures.items():
+        results[i] = future.result(PREDICT_TIMEOUT)
+        dept_cache.put(keys[i], results[i])
+    return results
+
+
+def ml_status() -> dict:
+    """Readiness and timing information for monitoring."""
+    return {
+        "ml_available": ML_AVAILABLE,
+        "backend": ML_BACKEND,
+        "model_state": model_state(),
+        "model_ready": model_ready(),
+        "model_load_seconds": MODEL_LOAD_SECONDS,
+        "batcher": dept_batcher.stats(),
+        "cache": dept_cache.stats(),
+    }
 
 
 def predict_worker(department: str = None, title: str = None, description: str = None) -> None:
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Re-run the department model over existing complaints (e.g. after a model update)
+
+Complaints are streamed in id order in chunks, classified in batches across a
+pool of worker processes (each loads the model once), and every changed
+department is written back with executemany in a single transaction.
+Without --dry-run the run aborts, writing nothing, unless the model is
+loaded in every worker; complaints whose department changed after they
+were read are left alone.
+
+Usage:
+    python reclassify_complaints.py --dry-run           # report only
+    python reclassify_complaints.py --workers 4         # classify and write
+    python reclassify_complaints.py --status Pending    # only open complaints
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from database_sqlite import bump_data_version, get_db_connection, get_write_connection
+
+
+def iter_chunks(chunk_size, status=None, limit=None):
+    """Yield lists of (id, title, description, department) in id order"""
+    last_id = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        sql = "SELECT id, title, description, department FROM complaints WHERE id > ?"
+        params = [last_id]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(size)
+        with get_db_connection() as conn:
+            rows = [tuple(row) for row in conn.execute(sql, params)]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def init_worker(batch_size, require_model=True):
+    """Load the model once per worker process"""
+    from ml import router
+    router.dept_batcher.max_batch_size = batch_size
+    if not router.load_model() and require_model:
+        raise RuntimeError(f"department model could not be loaded in process {os.getpid()}")
+
+
+def classify_chunk(rows, require_model=True):
+    """Return (id, old_department, new_department) for one chunk"""
+    from ml.router import model_ready, predict_departments
+    if require_model and not model_ready():
+        # Never write keyword-fallback guesses over model-assigned departments
+        raise RuntimeError(f"department model is not loaded in process {os.getpid()}")
+    departments = predict_departments([(title or "", description or "") for _, title, description, _ in rows])
+    return [(row_id, old, new) for (row_id, _, _, old), new in zip(rows, departments)]
+
+
+def classify_all(chunks, workers, batch_size, require_model=True):
+    """Classify every chunk, keeping at most 2 chunks per worker in flight"""
+    if workers <= 0:
+        init_worker(batch_size, require_model)
+        for rows in chunks:
+            yield classify_chunk(rows, require_model)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(batch_size, require_model)) as executor:
+        pending = set()
+        for rows in chunks:
+            pending.add(executor.submit(classify_chunk, rows, require_model))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def write_changes(changes):
+    """Apply (new_department, id, old_department) rows in one transaction; returns rows updated"""
+    with get_write_connection() as conn:
+        # Leave complaints alone whose department was changed since they were read
+        updated = conn.executemany(
+            "UPDATE complaints SET department = ? WHERE id = ? AND department IS ?", changes
+        ).rowcount
+        bump_data_version(conn, "complaints")
+    return updated
+
+
+def print_report(total, changes, updated, confusion, classify_seconds, write_seconds, dry_run):
+    print()
+    print("="*70)
+    print(f"  Classified {total} complaints in {classify_seconds:.1f}s "
+          f"({total / classify_seconds if classify_seconds else 0:.1f} rows/sec)")
+    if dry_run:
+        print(f"  {len(changes)} departments would change (dry run, nothing written)")
+    else:
+        print(f"  Updated {updated} complaints in {write_seconds:.2f}s "
+              f"({updated / write_seconds if write_seconds else 0:.1f} rows/sec)")
+        if updated < len(changes):
+            print(f"  Skipped {len(changes) - updated} complaints whose department changed meanwhile")
+    print("="*70)
+
+    if confusion:
+        print()
+        print(f"{'old department':<32} {'new department':<32} {'count':>6}")
+        print("-"*72)
+        for (old, new), count in confusion.most_common():
+            print(f"{str(old):<32} {new:<32} {count:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="classifier processes (0 = classify in this process)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="complaints read and classified per task")
+    parser.add_argument("--batch-size", type=int, default=32, help="texts per model forward pass")
+    parser.add_argument("--status", help="only reclassify complaints with this status")
+    parser.add_argument("--limit", type=int, help="stop after this many complaints")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    args = parser.parse_args(argv)
+
+    from ml.router import ML_AVAILABLE
+    if not ML_AVAILABLE:
+        if not args.dry_run:
+            print("❌ ML libraries not installed - refusing to overwrite departments with keyword guesses")
+            return 1
+        print("⚠️ ML libraries not installed - results come from the keyword fallback")
+
+    total = 0
+    changes = []
+    confusion = Counter()
+    started = time.perf_counter()
+    chunks = iter_chunks(args.chunk_size, args.status, args.limit)
+    try:
+        for results in classify_all(chunks, args.workers, args.batch_size, require_model=not args.dry_run):
+            total += len(results)
+            for row_id, old, new in results:
+                if new != old:
+                    changes.append((new, row_id, old))
+                    confusion[(old, new)] += 1
+            print(f"  ... {total} classified, {len(changes)} changed", end="\r")
+    except (RuntimeError, BrokenProcessPool) as e:
+        print(f"\n❌ Reclassification aborted, nothing written: {e}")
+        return 1
+    classify_seconds = time.perf_counter() - started
+
+    updated = 0
+    write_seconds = 0.0
+    if changes and not args.dry_run:
+        started = time.perf_counter()
+        updated = write_changes(changes)
+        write_seconds = time.perf_counter() - started
+
+    print_report(total, changes, updated, confusion, classify_seconds, write_seconds, args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
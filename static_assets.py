@@ -0,0 +1,97 @@
+"""
+Fingerprinted, long-cached static files
+
+url_for('static', ...) gets a ?v=<content hash> query string, and requests
+carrying the current hash are served with a one-year immutable
+Cache-Control, so browsers stop revalidating CSS, images and uploads on
+every dashboard visit. Uploads and thumbnails are already named by their
+SHA-256 and are treated as immutable without a query string. Conditional
+requests and Range are answered by werkzeug's send_file.
+
+To keep file bytes off the gunicorn worker, either set USE_X_SENDFILE=1
+(Apache mod_xsendfile, lighttpd) or point X_ACCEL_REDIRECT_PREFIX at an
+internal nginx location that aliases the static folder:
+
+    location /_static/ { internal; alias /srv/nagarik-connect/static/; }
+"""
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+from config import Config
+
+# <sha256>.<ext> uploads and <sha256>-<variant>.<ext> thumbnails
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(-\w+)?\.\w+$")
+
+_fingerprints = {}
+
+
+def is_content_addressed(filename):
+    return bool(_CONTENT_ADDRESSED.match(os.path.basename(filename)))
+
+
+def fingerprint(filename):
+    """Short content hash of a static file (None if it does not exist)"""
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()[:12]
+    _fingerprints[path] = ((stat.st_mtime_ns, stat.st_size), value)
+    return value
+
+
+def add_fingerprint(endpoint, values):
+    """url_defaults hook: append ?v=<hash> to static URLs"""
+    if endpoint != "static" or "v" in values:
+        return
+    filename = values.get("filename")
+    if not filename or is_content_addressed(filename):
+        return
+    value = fingerprint(filename)
+    if value:
+        values["v"] = value
+
+
+def serve_static(filename):
+    """Replacement for Flask's static view with cache and offload support"""
+    immutable = is_content_addressed(filename) or (
+        "v" in request.args and request.args["v"] == fingerprint(filename)
+    )
+    max_age = Config.STATIC_IMMUTABLE_MAX_AGE if immutable else Config.STATIC_MAX_AGE
+
+    if Config.X_ACCEL_REDIRECT_PREFIX:
+        path = safe_join(current_app.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        response.headers["X-Accel-Redirect"] = Config.X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + filename
+        response.cache_control.max_age = max_age
+    else:
+        response = send_from_directory(current_app.static_folder, filename, max_age=max_age)
+
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    app.config["USE_X_SENDFILE"] = Config.USE_X_SENDFILE
+    app.url_defaults(add_fingerprint)
+    app.view_functions["static"] = serve_static
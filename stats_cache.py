@@ -0,0 +1,72 @@
+"""
+Cached public complaint statistics for the landing page and /api/stats
+"""
+import hashlib
+import json
+import threading
+import time
+
+from config import Config
+from database_sqlite import get_db, status_buckets
+
+
+class StatsCache:
+    """Status counts held in memory, refreshed after a TTL and kept
+    current by write-through updates from the complaint routes"""
+    
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts = None
+        self._loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+    
+    def _fresh(self):
+        return self._counts is not None and time.monotonic() - self._loaded_at < self.ttl
+    
+    def get(self):
+        """Return {"total", "pending", "in_progress", "resolved"}"""
+        with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return dict(self._counts)
+            self.misses += 1
+        
+        counts = get_db().complaints.status_counts()
+        with self._lock:
+            self._counts = counts
+            self._loaded_at = time.monotonic()
+            return dict(counts)
+    
+    def etag(self, counts):
+        """Strong validator for a stats payload"""
+        payload = json.dumps(counts, sort_keys=True).encode()
+        return hashlib.md5(payload).hexdigest()
+    
+    def record_new_complaint(self, status="Pending"):
+        """Apply a newly inserted complaint to the cached counts"""
+        with self._lock:
+            if self._counts is None:
+                return
+            self._counts["total"] += 1
+            for bucket in status_buckets(status):
+                self._counts[bucket] += 1
+    
+    def record_status_change(self, old_status, new_status):
+        """Move one complaint between status buckets in the cached counts"""
+        with self._lock:
+            if self._counts is None:
+                return
+            for bucket in status_buckets(old_status):
+                self._counts[bucket] = max(0, self._counts[bucket] - 1)
+            for bucket in status_buckets(new_status):
+                self._counts[bucket] += 1
+    
+    def invalidate(self):
+        """Drop the cached counts; the next get() reloads them"""
+        with self._lock:
+            self._counts = None
+
+
+stats_cache = StatsCache(ttl=Config.STATS_CACHE_TTL)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Resized and recompressed variants of uploaded complaint photos
+
+After an upload is stored, a background pool writes a small "thumb" variant
+for dashboard tables and a "large" variant for the full-size viewer, each as
+WebP and JPEG, under static/uploads/thumbs. Templates call thumb_url(), which
+falls back to the original upload until the variant exists (or when Pillow
+is not installed).
+
+Run this file directly to generate variants for existing uploads.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, url_for
+
+from config import Config
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    print("⚠️ Pillow not installed - images are served without thumbnails")
+
+THUMB_FOLDER = os.path.join(Config.UPLOAD_FOLDER, "thumbs")
+THUMB_URL_PREFIX = "uploads/thumbs/"
+
+# variant -> longest side in pixels
+SIZES = {
+    "thumb": Config.THUMBNAIL_SIZE,
+    "large": Config.LARGE_IMAGE_SIZE,
+}
+FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+
+
+def variant_name(filename, size, extension):
+    return f"{filename.rsplit('.', 1)[0]}-{size}.{extension}"
+
+
+def generate_variants(filename, upload_folder=Config.UPLOAD_FOLDER, thumb_folder=THUMB_FOLDER):
+    """Write every missing variant of one upload; returns how many were written"""
+    wanted = [
+        (size, extension)
+        for size in SIZES
+        for extension in FORMATS
+        if not os.path.exists(os.path.join(thumb_folder, variant_name(filename, size, extension)))
+    ]
+    if not wanted:
+        return 0
+
+    os.makedirs(thumb_folder, exist_ok=True)
+    with Image.open(os.path.join(upload_folder, filename)) as source:
+        # Phone photos are stored sideways with an EXIF rotation flag
+        image = ImageOps.exif_transpose(source)
+        if image.mode != "RGB":
+            background = Image.new("RGB", image.size, "white")
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+
+        for size, extension in wanted:
+            variant = image.copy()
+            variant.thumbnail((SIZES[size], SIZES[size]))
+            path = os.path.join(thumb_folder, variant_name(filename, size, extension))
+            options = {"quality": Config.THUMBNAIL_QUALITY}
+            if extension == "jpg":
+                options.update(optimize=True, progressive=True)
+            # A private temp file per job, so two jobs for the same upload never collide
+            fd, tmp_path = tempfile.mkstemp(dir=thumb_folder, prefix=".thumb-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    variant.save(f, FORMATS[extension], **options)
+                os.chmod(tmp_path, 0o644)  # mkstemp creates files private to this user
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+    return len(wanted)
+
+
+class Thumbnailer:
+    """Generates variants on a small thread pool after each upload"""
+
+    def __init__(self, workers=2):
+        self.workers = max(1, workers)
+        self.generated = 0
+        self.errors = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+
+    def _run(self, filename):
+        try:
+            written = generate_variants(filename)
+            with self._lock:
+                self.generated += written
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"❌ Thumbnail generation failed for {filename}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(filename)
+
+    def submit(self, filename):
+        if not PIL_AVAILABLE or not filename:
+            return None
+        with self._lock:
+            if self._pid != os.getpid():
+                # Pool threads do not survive a fork into a gunicorn worker
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnails")
+                self._pid = os.getpid()
+                self._in_flight.clear()
+            # Uploads are content-addressed: a duplicate photo is the same file
+            if filename in self._in_flight:
+                return None
+            self._in_flight.add(filename)
+            return self._executor.submit(self._run, filename)
+
+    def stats(self):
+        with self._lock:
+            return {"pillow": PIL_AVAILABLE, "generated": self.generated, "errors": self.errors,
+                    "in_flight": len(self._in_flight)}
+
+
+thumbnailer = Thumbnailer(workers=Config.THUMBNAIL_WORKERS)
+
+
+def thumb_url(filename, size="thumb"):
+    """URL of the best available variant of an upload (template helper)"""
+    extensions = ["jpg"]
+    # Only trust an explicit image/webp (a */* wildcard would also match)
+    if any(mimetype == "image/webp" for mimetype, _ in request.accept_mimetypes):
+        extensions.insert(0, "webp")
+    for extension in extensions:
+        name = variant_name(filename, size, extension)
+        if os.path.exists(os.path.join(THUMB_FOLDER, name)):
+            return url_for("static", filename=THUMB_URL_PREFIX + name)
+    return url_for("static", filename="uploads/" + filename)
+
+
+if __name__ == "__main__":
+    if not PIL_AVAILABLE:
+        raise SystemExit("Install Pillow to generate thumbnails")
+    written = 0
+    for name in sorted(os.listdir(Config.UPLOAD_FOLDER)):
+        if os.path.isfile(os.path.join(Config.UPLOAD_FOLDER, name)) and not name.startswith("."):
+            try:
+                written += generate_variants(name)
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+    print(f"✅ Wrote {written} image variants to {THUMB_FOLDER}")
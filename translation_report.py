@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Translation coverage and lookup-cost report
+
+Renders every template in templates/ under each supported language with
+sample data and reports, per page and language:
+  - how many _() calls were made and how they resolved: translated in the
+    locale itself, fell back to English, or missing everywhere (raw key shown)
+  - the average render time and the estimated share spent in _()
+
+Usage:
+    python translation_report.py                    # all templates, all languages
+    python translation_report.py --repeat 20        # steadier timings
+    python translation_report.py --json i18n.json   # keep results for comparison across releases
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault("ML_WARMUP", "0")
+
+from flask import g, render_template, session
+
+from app import app
+from config import Config
+from fragment_cache import fragment_cache
+import i18n
+from translations import translations
+
+SAMPLE_COMPLAINT = {
+    "id": 1, "user_id": 1, "user_name": "Sample Citizen",
+    "title": "No water supply", "description": "No water in our street for three days",
+    "department": "Water Crisis", "status": "Pending", "created_at": "2024-01-01T10:00:00",
+    "image": None, "admin_image": None, "location": "MG Road", "latitude": None, "longitude": None,
+    "assigned_worker_id": 1, "assigned_worker_name": "Sample Worker", "assigned_worker_phone": "9999999999",
+    "worker_department": "Water Crisis", "remarks": None,
+}
+SAMPLE_WORKER = {"id": 1, "name": "Sample Worker", "phone": "9999999999",
+                 "department": "Water Crisis", "complaint_count": 1}
+SAMPLE_FEEDBACK = {"id": 1, "title": "Thanks", "message": "Fixed quickly", "rating": "5",
+                   "user_name": "Sample Citizen", "complaint_title": "No water supply",
+                   "created_at": "2024-01-02T10:00:00", "admin_reply": None}
+COUNTS = {"total": 4, "pending": 2, "in_progress": 1, "resolved": 1}
+
+SAMPLE_CONTEXT = {
+    "name": "Sample Citizen", "admin_name": "Water Department Admin", "department": "Water Crisis",
+    "complaints": [SAMPLE_COMPLAINT], "load_workers": lambda: [SAMPLE_WORKER],
+    "feedbacks": [SAMPLE_FEEDBACK],
+    "analytics": {"avg_rating": 4.5, "total_feedback": 2, "five_star": 1, "four_star": 1,
+                  "three_star": 0, "two_star": 0, "one_star": 0},
+    "departments": [{"name": "Water Crisis", "slug": "water"}],
+    "worker_info": {"name": "Sample Worker", "contact": "9999999999"},
+    "load_trend": lambda: (["2024-01"], [4]),
+    "next_cursor": None, "page_args": {},
+    "total": COUNTS["total"], "pending": COUNTS["pending"],
+    "in_progress": COUNTS["in_progress"], "resolved": COUNTS["resolved"],
+    "total_all": COUNTS["total"], "pending_all": COUNTS["pending"],
+    "in_progress_all": COUNTS["in_progress"], "resolved_all": COUNTS["resolved"],
+    "total_complaints": COUNTS["total"], "solved_complaints": COUNTS["resolved"],
+    "pending_complaints": COUNTS["pending"], "in_progress_complaints": COUNTS["in_progress"],
+    "error": None,
+}
+
+
+class CountingTranslator:
+    """Wraps a bound translator and classifies every lookup"""
+
+    def __init__(self, locale):
+        self.translate = i18n.translator(locale)
+        self.own = translations.get(locale, {})
+        self.default = translations[i18n.DEFAULT_LOCALE]
+        self.calls = 0
+        self.outcomes = Counter()
+        self.fallback_keys = set()
+        self.missing_keys = set()
+
+    def __call__(self, key):
+        self.calls += 1
+        if key in self.own:
+            self.outcomes["translated"] += 1
+        elif key in self.default:
+            self.outcomes["fallback"] += 1
+            self.fallback_keys.add(key)
+        else:
+            self.outcomes["missing"] += 1
+            self.missing_keys.add(key)
+        return self.translate(key)
+
+
+def render(template, locale, translate):
+    with app.test_request_context("/"):
+        session["lang"] = locale
+        g.translate = translate
+        return render_template(template, current_lang=locale, **SAMPLE_CONTEXT)
+
+
+def lookup_cost_ms(locale, calls):
+    """Time `calls` lookups through the bound translator"""
+    translate = i18n.translator(locale)
+    keys = list(translations[i18n.DEFAULT_LOCALE])
+    started = time.perf_counter()
+    for i in range(calls):
+        translate(keys[i % len(keys)])
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(template, locale, repeat):
+    counter = CountingTranslator(locale)
+    render(template, locale, counter)
+
+    translate = i18n.translator(locale)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(template, locale, translate)
+    render_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    return {
+        "template": template,
+        "locale": locale,
+        "render_ms": round(render_ms, 3),
+        "translate_ms": round(lookup_cost_ms(locale, counter.calls), 4),
+        "calls": counter.calls,
+        "translated": counter.outcomes["translated"],
+        "fallback": counter.outcomes["fallback"],
+        "missing": counter.outcomes["missing"],
+        "fallback_keys": sorted(counter.fallback_keys),
+        "missing_keys": sorted(counter.missing_keys),
+    }
+
+
+def catalog_coverage():
+    """Keys defined in English but not in each other locale"""
+    english = translations[i18n.DEFAULT_LOCALE]
+    return {
+        locale: sorted(set(english) - set(table))
+        for locale, table in translations.items()
+        if locale != i18n.DEFAULT_LOCALE
+    }
+
+
+def print_report(results, errors, coverage, verbose):
+    print("="*92)
+    print(f"  {'template':<28} {'lang':<5} {'render ms':>10} {'_() ms':>8} {'calls':>6} "
+          f"{'native':>7} {'fallback':>9} {'missing':>8}")
+    print("="*92)
+    for r in results:
+        print(f"  {r['template']:<28} {r['locale']:<5} {r['render_ms']:>10.2f} {r['translate_ms']:>8.3f} "
+              f"{r['calls']:>6} {r['translated']:>7} {r['fallback']:>9} {r['missing']:>8}")
+    for template, locale, error in errors:
+        print(f"  {template:<28} {locale:<5} ❌ {error}")
+
+    print()
+    print("Per language:")
+    for locale in Config.LANGUAGES:
+        rows = [r for r in results if r["locale"] == locale]
+        calls = sum(r["calls"] for r in rows)
+        fallback = {k for r in rows for k in r["fallback_keys"]}
+        missing = {k for r in rows for k in r["missing_keys"]}
+        print(f"  {locale}: {len(translations.get(locale, {}))} keys defined, "
+              f"{len(coverage.get(locale, []))} missing vs English, "
+              f"{calls} lookups rendered, {len(fallback)} keys shown in English, "
+              f"{len(missing)} keys shown raw")
+        if verbose:
+            if fallback:
+                print(f"      English fallback: {', '.join(sorted(fallback))}")
+            if missing:
+                print(f"      raw keys: {', '.join(sorted(missing))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed renders per template and language")
+    parser.add_argument("--templates", nargs="*", help="only these templates (default: all)")
+    parser.add_argument("--languages", nargs="*", default=Config.LANGUAGES)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list the fallback and raw keys")
+    args = parser.parse_args(argv)
+
+    # Measure full renders, not cached fragments
+    fragment_cache.enabled = False
+
+    templates = args.templates or sorted(
+        name for name in os.listdir(app.template_folder) if name.endswith(".html")
+    )
+
+    results, errors = [], []
+    for template in templates:
+        for locale in args.languages:
+            try:
+                results.append(measure(template, locale, max(1, args.repeat)))
+            except Exception as e:
+                errors.append((template, locale, f"{type(e).__name__}: {e}"))
+
+    coverage = catalog_coverage()
+    print_report(results, errors, coverage, args.verbose)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "results": results,
+                "errors": [{"template": t, "locale": l, "error": e} for t, l, e in errors],
+                "missing_vs_english": coverage,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Wrote {args.json}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -942,3 +942,14 @@ translations["ta"]["worker_phone"] = "தொழிலாளர் தொலை
 translations["ta"]["action"] = "செயல்"
 translations["ta"]["cancel"] = "ரத்து செய்"
 translations["ta"]["total"] = "மொத்தம்"
+
+translations["en"]["first_page"] = "First page"
+translations["en"]["next_page"] = "Next page"
+translations["kn"]["first_page"] = "ಮೊದಲ ಪುಟ"
+translations["kn"]["next_page"] = "ಮುಂದಿನ ಪುಟ"
+translations["hi"]["first_page"] = "पहला पृष्ठ"
+translations["hi"]["next_page"] = "अगला पृष्ठ"
+translations["te"]["first_page"] = "మొదటి పేజీ"
+translations["te"]["next_page"] = "తదుపరి పేజీ"
+translations["ta"]["first_page"] = "முதல் பக்கம்"
+translations["ta"]["next_page"] = "அடுத்த பக்கம்"
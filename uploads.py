@@ -0,0 +1,88 @@
+"""
+Streaming image uploads stored under their content hash
+
+Files are copied to disk in fixed-size chunks while being hashed, so memory
+per upload stays bounded and oversized files are rejected as soon as they
+cross the limit. The stored name is the SHA-256 of the content, which means
+the same photo uploaded twice is kept once and different photos sharing a
+name never overwrite each other.
+"""
+import hashlib
+import os
+import tempfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from config import Config
+
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of each supported format -> stored extension
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def sniff_extension(head):
+    """Image type from the first bytes of the file, or None"""
+    for signature, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def save_upload(file_storage, folder, max_size=None):
+    """Store an uploaded image under its SHA-256 and return the filename
+
+    Returns None when no file was sent or it is not a supported image;
+    raises RequestEntityTooLarge once more than max_size bytes arrive.
+    """
+    if not file_storage or not file_storage.filename or not allowed_file(file_storage.filename):
+        return None
+    max_size = max_size or Config.MAX_IMAGE_SIZE
+
+    stream = file_storage.stream
+    head = stream.read(CHUNK_SIZE)
+    extension = sniff_extension(head)
+    if extension is None:
+        return None
+
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    # Write next to the final location so the rename below is atomic
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_size:
+                    raise RequestEntityTooLarge(f"Image larger than {max_size // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = stream.read(CHUNK_SIZE)
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            # Duplicate photo: keep the stored copy
+            os.remove(tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)  # mkstemp creates files private to this user
+            os.replace(tmp_path, path)
+        return filename
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise